@@ -0,0 +1,153 @@
+'''
+	Solve a file of diagonal sudokus (one 81-character grid per line, with '.' for
+	the empty boxes) over a pool of worker processes, write the solutions in the
+	order of the puzzles and report the throughput and solve time percentiles:
+
+		python batch_solve.py puzzles.txt -o solutions.txt -p 4
+
+	Each output line is the 81 digits of the solution, or '-' if the puzzle has
+	no solution.  Blank lines and lines starting with '#' are skipped, and so are
+	the malformed lines (reported on the standard error with their numbers).
+
+	With `--count N`, each output line is instead the number of solutions of the
+	puzzle, counted by the dancing-links backend up to N (`--count 2` checks that
+	every puzzle has a unique solution).
+'''
+
+import argparse
+import math
+import os
+import sys
+import time
+
+from multiprocessing import Pool
+
+import solution
+import sudoku_array
+import sudoku_dlx
+import sudoku_strategies
+from solution import boxes
+
+ENGINES = {'array': sudoku_array.solve, 'dict': solution.solve, 'strategies': sudoku_strategies.solve,
+		   'dlx': sudoku_dlx.solve}
+
+GRID_CHARS = '123456789.'
+
+
+
+def init_worker():
+	'''
+		Nothing is visualized, so the dict engine does not need to record its
+		assignments.
+	'''
+	solution.record = None
+
+
+
+def read_puzzles(f, skipped=None):
+	'''
+		Yield the puzzles of a file, one stripped line at a time.  The lines that
+		are not an 81-character grid are reported and skipped, and their numbers
+		are appended to the list `skipped` (if given).
+	'''
+	for number, line in enumerate(f, 1):
+		line = line.strip()
+		if not line or line.startswith('#'):
+			continue
+		if len(line) != 81 or line.strip(GRID_CHARS):
+			print('line {}: not an 81-character grid, skipped'.format(number), file=sys.stderr)
+			if skipped is not None:
+				skipped.append(number)
+			continue
+		yield line
+
+
+
+def solve_line(job):
+	'''
+		Solve one puzzle with the given engine, or count its solutions up to
+		`limit` if it is not None.  Return the output line and the solve time in
+		seconds.
+	'''
+	engine, grid, limit = job
+	start = time.perf_counter()
+	if limit is not None:
+		line = str(sudoku_dlx.count(grid, limit=limit))
+	else:
+		values = ENGINES[engine](grid)
+		line = ''.join(values[box] for box in boxes) if values else '-'
+	return line, time.perf_counter() - start
+
+
+
+def percentile(times, p):
+	'''
+		Return the p-th percentile (nearest rank) of a sorted list of times.
+	'''
+	if not times:
+		return 0.
+	return times[max(0, math.ceil(p / 100. * len(times)) - 1)]
+
+
+
+def solve_batch(puzzles, out, engine='array', processes=1, chunksize=64, limit=None):
+	'''
+		Solve an iterable of puzzles (or count their solutions up to `limit`),
+		write the results to the file `out` in order and return the list of solve
+		times.
+	'''
+	jobs  = ((engine, grid, limit) for grid in puzzles)
+	times = []
+	if processes > 1:
+		with Pool(processes, initializer=init_worker) as pool:
+			for line, elapsed in pool.imap(solve_line, jobs, chunksize):
+				out.write(line + '\n')
+				times.append(elapsed)
+	else:
+		for line, elapsed in map(solve_line, jobs):
+			out.write(line + '\n')
+			times.append(elapsed)
+	return times
+
+
+
+def main(args):
+	init_worker()
+	start   = time.perf_counter()
+	skipped = []
+	with open(args.puzzles) as f:
+		out = open(args.output, 'w') if args.output else sys.stdout
+		try:
+			times = solve_batch(read_puzzles(f, skipped), out, args.engine, args.processes,
+								args.chunksize, args.count)
+		finally:
+			if out is not sys.stdout:
+				out.close()
+	wall = time.perf_counter() - start
+
+	times.sort()
+	print('{} puzzles in {:.2f}s: {:.1f} puzzles/s, p50 {:.2f}ms, p99 {:.2f}ms'.format(
+		len(times), wall, len(times) / wall if wall else 0.,
+		1000 * percentile(times, 50), 1000 * percentile(times, 99)), file=sys.stderr)
+	if skipped:
+		print('{} malformed lines skipped'.format(len(skipped)), file=sys.stderr)
+
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Solve a file of diagonal sudokus.')
+	parser.add_argument('puzzles', help='file of puzzles, one 81-character grid per line')
+	parser.add_argument('-o', '--output', default=None,
+						help='file the solutions are written to (standard output by default)')
+	parser.add_argument('-p', '--processes', type=int, default=0,
+						help='number of worker processes (0 for one per CPU core)')
+	parser.add_argument('-e', '--engine', choices=sorted(ENGINES), default='array',
+						help='solver engine')
+	parser.add_argument('--count', type=int, default=None, metavar='N',
+						help='write the number of solutions of every puzzle (up to N) instead')
+	parser.add_argument('-c', '--chunksize', type=int, default=64,
+						help='number of puzzles sent to a worker at a time')
+	args = parser.parse_args()
+	if args.processes == 0:
+		args.processes = os.cpu_count()
+	main(args)
@@ -9,6 +9,21 @@ rows = 'ABCDEFGHI'
 cols = '123456789'
 
 assignments = []
+'''
+	How `assign_value` records the assignments in `assignments`:
+		'full'  - a copy of the values dictionary after every single-digit assignment,
+		'delta' - only the (box, value, snapshot) triple of every change, where
+		          `snapshot` is True if 'full' mode would have copied the values after
+		          it; see `expand_assignments` to rebuild the copies (exactly with
+		          the trail-based search, which also records the changes it undoes),
+		None    - nothing.
+'''
+record = 'full'
+'''
+	The undo trail of the trail-based search: the (box, previous value) of every
+	change made by `assign_value`, or None outside of a trail-based search.
+'''
+trail = None
 
 cross = lambda a, b: [s+t for s in a for t in b]
 boxes = cross(rows, cols)
@@ -51,9 +66,43 @@ def assign_value(values, box, value):
 	"""
 
 	# Don't waste memory appending actions that don't actually change any values
+	# to the trail or the deltas; 'full' mode still copies the values after every
+	# single-digit assignment, and 'delta' mode keeps those snapshots to match it
+	changed = values[box] != value
+	if trail is not None and changed:
+		trail.append((box, values[box]))
 	values[box] = value
-	if len(value) == 1:
-		assignments.append(values.copy())
+	if record == 'full':
+		if len(value) == 1:
+			assignments.append(values.copy())
+	elif record == 'delta' and (changed or len(value) == 1):
+		assignments.append((box, value, len(value) == 1))
+	return values
+
+
+
+def expand_assignments(values, deltas):
+	'''
+		Rebuild the values dictionaries recorded in 'full' mode from the initial
+		values and the changes recorded in 'delta' mode.
+	'''
+	values = values.copy()
+	for box, value, snapshot in deltas:
+		values[box] = value
+		if snapshot:
+			yield values.copy()
+
+
+
+def undo(values, mark):
+	'''
+		Undo the changes recorded in the trail since it had `mark` entries.
+	'''
+	while len(trail) > mark:
+		box, value = trail.pop()
+		values[box] = value
+		if record == 'delta':
+			assignments.append((box, value, False))
 	return values
 
 
@@ -148,11 +197,22 @@ def reduce_puzzle(values, naked=True):
 
 
 
-def solve(grid, naked=True):
+def solve(grid, naked=True, use_trail=False):
 	'''
-		Calls the `search` function (choose to involve the `naked_twins` function or not).
+		Calls the `search` function (choose to involve the `naked_twins` function or not),
+		or the `trail_search` function, which backtracks by undoing the changes instead
+		of copying the values for every branch.
 	'''
-	return search(grid, naked)
+	global trail
+	if not use_trail:
+		return search(grid, naked)
+
+	values = grid.copy() if (type(grid)==dict) else grid_values(grid)
+	trail  = []
+	try:
+		return trail_search(values, naked)
+	finally:
+		trail = None
 
 
 
@@ -181,6 +241,30 @@ def search(grid, naked=True):
 
 
 
+def trail_search(values, naked=True):
+	'''
+		Same search as `search`, on a single values dictionary: every change is
+		recorded in the trail, and undone when a branch fails.
+	'''
+	values = reduce_puzzle(values, naked)
+
+	if values is False:
+		return False
+	if all(len(values[s]) == 1 for s in boxes):
+		return values
+
+	_, s = min((len(values[s]), s) for s in boxes if len(values[s]) > 1)
+
+	for value in values[s]:
+		mark = len(trail)
+		assign_value(values, s, value)
+		if trail_search(values, naked):
+			return values
+		undo(values, mark)
+	return False
+
+
+
 if __name__ == '__main__':
 	diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 	diag_sudoku_grid = '9.1....8.8.5.7..4.2.4....6...7......5..............83.3..6......9................'  # evil
@@ -0,0 +1,282 @@
+"""Unit tests of the diagonal sudoku solvers: every engine must solve the
+known puzzles and agree with `solution.solve`.
+"""
+
+import contextlib
+import io
+import itertools
+import unittest
+
+from importlib import reload
+
+import batch_solve
+import solution
+import sudoku_array
+import sudoku_dlx
+import sudoku_strategies
+from solution import boxes, peers, row_units, column_units, square_units
+
+# Diagonal sudokus with a unique solution
+DIAGONAL_PUZZLES = [
+    '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3',
+    '............1....74...6....51...9...2..8..3..8...............8..2...8...1.95.4...',
+    '.3.16...............4......8.....41...........713.9....675......5.7.......2..6...',
+]
+
+# Standard sudokus (no diagonal units) with a unique solution
+STANDARD_PUZZLES = [
+    '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......',
+    '..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..',
+]
+
+# A diagonal sudoku with several solutions
+AMBIGUOUS_PUZZLE = '9.1....8.8.5.7..4.2.4....6...7......5..............83.3..6......9................'
+
+# Two equal givens in the same row
+CONFLICTING_PUZZLE = '1.......1' + '.' * 72
+
+
+class SudokuTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.record = solution.record
+        solution.record = None
+
+    def tearDown(self):
+        solution.record = self.record
+
+    def assertSolves(self, values, grid):
+        self.assertTrue(values)
+        for box, c in zip(boxes, grid):
+            if c != '.':
+                self.assertEqual(values[box], c)
+        for box in boxes:
+            self.assertEqual(len(values[box]), 1)
+            self.assertNotIn(values[box], [values[peer] for peer in peers[box]])
+
+
+class ArrayEngineTest(SudokuTestCase):
+    """The array engine must find the solutions of the dictionary solver"""
+
+    def test_solve(self):
+        for grid in DIAGONAL_PUZZLES:
+            values = sudoku_array.solve(grid)
+            self.assertSolves(values, grid)
+            self.assertEqual(values, solution.solve(grid))
+
+    def test_solve_values(self):
+        grid = DIAGONAL_PUZZLES[0]
+        self.assertEqual(sudoku_array.solve(solution.grid_values(grid)), solution.solve(grid))
+
+    def test_cells(self):
+        grid = DIAGONAL_PUZZLES[0]
+        self.assertEqual(sudoku_array.cells_values(sudoku_array.grid_cells(grid)),
+                         solution.grid_values(grid))
+
+    def test_reduce_puzzle(self):
+        for grid in DIAGONAL_PUZZLES:
+            cells = sudoku_array.reduce_puzzle(sudoku_array.grid_cells(grid))
+            self.assertEqual(sudoku_array.cells_values(cells),
+                             solution.reduce_puzzle(solution.grid_values(grid)))
+
+    def test_no_solution(self):
+        self.assertFalse(sudoku_array.solve(CONFLICTING_PUZZLE))
+
+
+class PropagationTest(SudokuTestCase):
+    """Queue propagation must reach the fixed point of the full sweeps"""
+
+    def test_fixed_point(self):
+        for grid in DIAGONAL_PUZZLES:
+            for naked in (False, True):
+                swept = sudoku_array.reduce_puzzle(sudoku_array.grid_cells(grid), naked)
+                propagated = sudoku_array.propagate(sudoku_array.grid_cells(grid), naked=naked)
+                self.assertEqual(propagated, swept)
+
+    def test_dirty_boxes(self):
+        # placing a digit only needs the consequences of that box propagated
+        grid = DIAGONAL_PUZZLES[1]
+        cells = sudoku_array.propagate(sudoku_array.grid_cells(grid))
+        box = min((sudoku_array.bit_count[mask], i) for i, mask in enumerate(cells)
+                  if sudoku_array.bit_count[mask] > 1)[1]
+        cells[box] &= -cells[box]
+        expected = sudoku_array.reduce_puzzle(cells[:])
+        self.assertEqual(sudoku_array.propagate(cells[:], (box,)), expected)
+
+    def test_contradiction(self):
+        self.assertFalse(sudoku_array.propagate(sudoku_array.grid_cells(CONFLICTING_PUZZLE)))
+
+
+class TrailSearchTest(SudokuTestCase):
+    """The trail-based search must undo its changes exactly"""
+
+    def tearDown(self):
+        SudokuTestCase.tearDown(self)
+        solution.trail = None
+        del solution.assignments[:]
+
+    def test_solve(self):
+        for grid in DIAGONAL_PUZZLES:
+            values = solution.solve(grid, use_trail=True)
+            self.assertSolves(values, grid)
+            self.assertEqual(values, solution.solve(grid))
+        self.assertIsNone(solution.trail)
+
+    def test_undo(self):
+        values = solution.grid_values(DIAGONAL_PUZZLES[1])
+        before = values.copy()
+        solution.trail = []
+        solution.reduce_puzzle(values)
+        mark = len(solution.trail)
+        self.assertGreater(mark, 0)
+        reduced = values.copy()
+
+        # the changes of a branch are undone back to its mark, then to the start
+        solution.assign_value(values, 'A1', '9')
+        solution.reduce_puzzle(values)
+        solution.undo(values, mark)
+        self.assertEqual(values, reduced)
+        self.assertEqual(len(solution.trail), mark)
+        solution.undo(values, 0)
+        self.assertEqual(values, before)
+
+    def test_delta_recording(self):
+        grid = DIAGONAL_PUZZLES[0]
+        solution.record = 'full'
+        solution.solve(grid, use_trail=True)
+        full = solution.assignments[:]
+        del solution.assignments[:]
+        solution.record = 'delta'
+        solution.solve(grid, use_trail=True)
+        deltas = solution.assignments[:]
+        self.assertTrue(all(len(delta) == 3 for delta in deltas))
+        self.assertEqual(list(solution.expand_assignments(solution.grid_values(grid), deltas)), full)
+
+    def test_unchanged_assignments(self):
+        values = solution.grid_values(DIAGONAL_PUZZLES[0])
+        solution.trail = []
+        # 'full' mode copies the values after every single-digit assignment
+        solution.record = 'full'
+        solution.assign_value(values, 'A1', '2')
+        self.assertEqual(solution.assignments, [values])
+        # 'delta' mode only keeps the snapshot, and nothing is left to undo
+        del solution.assignments[:]
+        solution.record = 'delta'
+        solution.assign_value(values, 'A1', '2')
+        solution.assign_value(values, 'A2', values['A2'])
+        self.assertEqual(solution.assignments, [('A1', '2', True)])
+        self.assertEqual(solution.trail, [])
+
+
+class StrategiesTest(SudokuTestCase):
+    """The inference strategies must only remove impossible candidates"""
+
+    def test_solve(self):
+        for grid in DIAGONAL_PUZZLES:
+            expected = solution.solve(grid)
+            for name in sudoku_strategies.strategies:
+                values = sudoku_strategies.solve(grid, [name])
+                self.assertSolves(values, grid)
+                self.assertEqual(values, expected)
+            self.assertEqual(sudoku_strategies.solve(grid), expected)
+
+    def test_sound(self):
+        for grid in DIAGONAL_PUZZLES:
+            values = solution.solve(grid)
+            solved = sudoku_array.grid_cells(''.join(values[box] for box in boxes))
+            cells = sudoku_array.propagate(sudoku_array.grid_cells(grid))
+            for name, strategy in sudoku_strategies.strategies.items():
+                reduced = cells[:]
+                changed = strategy(reduced)
+                for i, mask in enumerate(reduced):
+                    self.assertTrue(mask & solved[i])
+                    self.assertEqual(i in changed, mask != cells[i])
+
+    def test_counters(self):
+        sudoku_strategies.reset_counters()
+        for grid in DIAGONAL_PUZZLES:
+            sudoku_strategies.solve(grid)
+        self.assertGreater(sum(sudoku_strategies.hits.values()), 0)
+        for name in sudoku_strategies.strategies:
+            self.assertLessEqual(sudoku_strategies.hits[name], sudoku_strategies.calls[name])
+            self.assertGreaterEqual(sudoku_strategies.eliminations[name], sudoku_strategies.hits[name])
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            sudoku_strategies.inference(['swordfish'])
+
+
+class DancingLinksTest(SudokuTestCase):
+    """The exact cover backend must solve any unit list"""
+
+    def test_solve(self):
+        for grid in DIAGONAL_PUZZLES:
+            values = sudoku_dlx.solve(grid)
+            self.assertSolves(values, grid)
+            self.assertEqual(values, solution.solve(grid))
+            self.assertTrue(sudoku_dlx.is_unique(grid))
+
+    def test_standard_units(self):
+        units = row_units + column_units + square_units
+        for grid in STANDARD_PUZZLES:
+            values = sudoku_dlx.solve(grid, units)
+            self.assertTrue(values)
+            for unit in units:
+                self.assertEqual(sorted(values[box] for box in unit), list('123456789'))
+            self.assertEqual(sudoku_dlx.count(grid, units), 1)
+            # the standard solution breaks the diagonal units
+            self.assertEqual(sudoku_dlx.count(grid), 0)
+
+    def test_count(self):
+        self.assertEqual(sudoku_dlx.count(AMBIGUOUS_PUZZLE, limit=2), 2)
+        self.assertFalse(sudoku_dlx.is_unique(AMBIGUOUS_PUZZLE))
+        solutions = list(itertools.islice(sudoku_dlx.solutions(AMBIGUOUS_PUZZLE), 3))
+        self.assertEqual(len(solutions), 3)
+        for values in solutions:
+            self.assertSolves(values, AMBIGUOUS_PUZZLE)
+        self.assertEqual(len(set(tuple(sorted(values.items())) for values in solutions)), 3)
+
+    def test_no_solution(self):
+        self.assertFalse(sudoku_dlx.solve(CONFLICTING_PUZZLE))
+        self.assertEqual(sudoku_dlx.count(CONFLICTING_PUZZLE), 0)
+        # the matrix is restored after every search
+        self.assertEqual(sudoku_dlx.solve(DIAGONAL_PUZZLES[0]), solution.solve(DIAGONAL_PUZZLES[0]))
+
+
+class BatchSolveTest(SudokuTestCase):
+    """The batch solver must write one line per valid puzzle, in order"""
+
+    def test_engines(self):
+        expected = [''.join(values[box] for box in boxes)
+                    for values in map(solution.solve, DIAGONAL_PUZZLES)]
+        runs = [(engine, 1) for engine in sorted(batch_solve.ENGINES)] + [('array', 2)]
+        for engine, processes in runs:
+            out = io.StringIO()
+            times = batch_solve.solve_batch(DIAGONAL_PUZZLES, out, engine, processes, chunksize=1)
+            self.assertEqual(out.getvalue().split(), expected)
+            self.assertEqual(len(times), len(DIAGONAL_PUZZLES))
+
+    def test_malformed_lines(self):
+        lines = ['# diagonal sudokus', DIAGONAL_PUZZLES[0], '', DIAGONAL_PUZZLES[1][:80],
+                 DIAGONAL_PUZZLES[1].replace('.', '0'), CONFLICTING_PUZZLE, DIAGONAL_PUZZLES[2]]
+        skipped, out = [], io.StringIO()
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            batch_solve.solve_batch(batch_solve.read_puzzles(io.StringIO('\n'.join(lines)), skipped), out)
+        self.assertEqual(skipped, [4, 5])
+        self.assertEqual(len(err.getvalue().splitlines()), 2)
+        results = out.getvalue().split()
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[1], '-')
+
+    def test_grid_length(self):
+        with self.assertRaises(ValueError):
+            sudoku_array.solve(DIAGONAL_PUZZLES[0][:80])
+
+    def test_import_keeps_recording(self):
+        solution.record = 'full'
+        reload(batch_solve)
+        self.assertEqual(solution.record, 'full')
+
+
+if __name__ == '__main__':
+    unittest.main()
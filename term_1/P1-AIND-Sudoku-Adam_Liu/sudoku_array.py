@@ -0,0 +1,244 @@
+'''
+	An array-backed engine for the diagonal sudoku solver in `solution.py`.
+
+	The grid is a list of 81 integers, one per box in the order of `boxes`,
+	where bit d-1 is set if the digit d is still possible in the box.  The
+	units and peers of `solution.py` are precomputed as tuples of box indices,
+	so the strategies only do integer operations instead of string `replace`
+	calls, and `solve(grid)` returns the same values dictionary.
+
+	`reduce_puzzle` sweeps every box and unit until nothing changes, as in
+	`solution.py`.  `propagate` reaches the same fixed point incrementally: it
+	keeps a queue of the boxes whose candidates changed and a set of the units
+	containing them, and only revisits those (in the manner of AC-3), so the
+	search only pays for the consequences of the digit it just placed.
+
+	The search can also run extra inference between propagation and branching,
+	see `sudoku_strategies.py`; `counters['nodes']` counts the search nodes.
+'''
+
+from collections import Counter
+
+from solution import boxes, unitlist, units, peers
+
+ALL    = 0x1FF
+DIGITS = '123456789'
+
+index      = dict((box, i) for i, box in enumerate(boxes))
+unit_index = [tuple(index[box] for box in unit) for unit in unitlist]
+peer_index = [tuple(sorted(index[peer] for peer in peers[box])) for box in boxes]
+units_of   = [tuple(unitlist.index(unit) for unit in units[box]) for box in boxes]
+
+# Number of candidates and candidate string of every mask
+bit_count = [bin(mask).count('1') for mask in range(ALL + 1)]
+mask_digits = [''.join(d for i, d in enumerate(DIGITS) if mask >> i & 1) for mask in range(ALL + 1)]
+digit_mask = dict((d, 1 << i) for i, d in enumerate(DIGITS))
+
+counters = Counter()
+
+
+
+def grid_cells(grid):
+	'''
+		Convert a grid string into the list of candidate masks of the 81 boxes.
+		Raise ValueError if the grid does not have 81 boxes.
+	'''
+	cells = [digit_mask[c] if c in digit_mask else ALL for c in grid if c in DIGITS or c == '.']
+	if len(cells) != 81:
+		raise ValueError('A grid has 81 boxes, not {}'.format(len(cells)))
+	return cells
+
+
+
+def cells_values(cells):
+	'''
+		Convert a list of candidate masks into a values dictionary of the form
+		{'box_name': '123456789', ...}.
+	'''
+	return dict(zip(boxes, (mask_digits[mask] for mask in cells)))
+
+
+
+def eliminate(cells):
+	'''
+		Remove the digit of every solved box from the candidates of its peers.
+	'''
+	for i, mask in enumerate(cells):
+		if bit_count[mask] == 1:
+			for peer in peer_index[i]:
+				cells[peer] &= ~mask
+	return cells
+
+
+
+def only_choice(cells):
+	'''
+		Assign every digit that fits in a single box of a unit to that box.
+		Return False if a digit fits in no box of a unit.
+	'''
+	cells = eliminate(cells)
+	for unit in unit_index:
+		once = twice = 0
+		for i in unit:
+			twice |= once & cells[i]
+			once  |= cells[i]
+		if once != ALL:
+			return False
+		unique = once & ~twice
+		if unique:
+			for i in unit:
+				if cells[i] & unique:
+					cells[i] &= unique
+	return cells
+
+
+
+def naked_twins(cells):
+	'''
+		Eliminate the digits of the naked twins of every unit from the other
+		boxes of the unit.
+	'''
+	for unit in unit_index:
+		pairs = [cells[i] for i in unit if bit_count[cells[i]] == 2]
+		for twin in set(pair for pair in pairs if pairs.count(pair) == 2):
+			for i in unit:
+				if cells[i] != twin:
+					cells[i] &= ~twin
+	return cells
+
+
+
+def reduce_puzzle(cells, naked=True):
+	'''
+		Apply the strategies until they stall.  Return False if a box has no
+		candidate left or a digit has no box left in a unit.
+	'''
+	stalled = False
+	while not stalled:
+		before = sum(bit_count[mask] for mask in cells)
+		if only_choice(cells) is False:
+			return False
+		if naked:
+			naked_twins(cells)
+		if 0 in cells:
+			return False
+		stalled = before == sum(bit_count[mask] for mask in cells)
+	return cells
+
+
+
+def propagate(cells, dirty=None, naked=True):
+	'''
+		Apply the strategies to the boxes in `dirty` (all of them by default)
+		and their units, then to the boxes and units their changes affect,
+		until nothing changes.  Return False on a contradiction.
+	'''
+	queue  = list(range(81)) if dirty is None else list(dirty)
+	queued = [False] * 81
+	for i in queue:
+		queued[i] = True
+	dirty_units = set()
+
+	while queue or dirty_units:
+		while queue:
+			i = queue.pop()
+			queued[i] = False
+			mask = cells[i]
+			if not mask:
+				return False
+			if bit_count[mask] == 1:
+				for peer in peer_index[i]:
+					if cells[peer] & mask:
+						cells[peer] &= ~mask
+						if not queued[peer]:
+							queued[peer] = True
+							queue.append(peer)
+			dirty_units.update(units_of[i])
+
+		if not dirty_units:
+			break
+		unit = unit_index[dirty_units.pop()]
+		changed = []
+
+		# only choice: a digit that fits in a single box of the unit
+		once = twice = 0
+		for i in unit:
+			twice |= once & cells[i]
+			once  |= cells[i]
+		if once != ALL:
+			return False
+		unique = once & ~twice
+		if unique:
+			for i in unit:
+				if cells[i] & unique and cells[i] != cells[i] & unique:
+					cells[i] &= unique
+					changed.append(i)
+
+		# naked twins
+		if naked:
+			pairs = [cells[i] for i in unit if bit_count[cells[i]] == 2]
+			for twin in set(pair for pair in pairs if pairs.count(pair) == 2):
+				for i in unit:
+					if cells[i] != twin and cells[i] & twin:
+						cells[i] &= ~twin
+						changed.append(i)
+
+		for i in changed:
+			if not queued[i]:
+				queued[i] = True
+				queue.append(i)
+	return cells
+
+
+
+def search(cells, naked=True, dirty=None, infer=None):
+	'''
+		Propagate the changes of the boxes in `dirty` (all of them by default),
+		then try every candidate of the box with the fewest candidates.  Return
+		the solved cells, or False.
+
+		`infer(cells)` (optional) is called whenever propagation stalls; it
+		returns the list of the boxes it changed (empty if none), or False on a
+		contradiction.
+	'''
+	counters['nodes'] += 1
+	if propagate(cells, dirty, naked) is False:
+		return False
+	if infer is not None:
+		changed = infer(cells)
+		while changed:
+			if propagate(cells, changed, naked) is False:
+				return False
+			changed = infer(cells)
+		if changed is False:
+			return False
+
+	unsolved = [(bit_count[mask], i) for i, mask in enumerate(cells) if bit_count[mask] > 1]
+	if not unsolved:
+		return cells
+	_, box = min(unsolved)
+
+	mask = cells[box]
+	while mask:
+		digit = mask & -mask
+		mask ^= digit
+		attempt = cells[:]
+		attempt[box] = digit
+		attempt = search(attempt, naked, (box,), infer)
+		if attempt:
+			return attempt
+	return False
+
+
+
+def solve(grid, naked=True, infer=None):
+	'''
+		Solve a diagonal sudoku given as a grid string (or a values dictionary),
+		and return the solved values dictionary, or False if it has no solution.
+	'''
+	if type(grid) == dict:
+		cells = [sum(digit_mask[d] for d in grid[box]) for box in boxes]
+	else:
+		cells = grid_cells(grid)
+	cells = search(cells, naked, infer=infer)
+	return cells_values(cells) if cells else False
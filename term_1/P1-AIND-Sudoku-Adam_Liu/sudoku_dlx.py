@@ -0,0 +1,279 @@
+'''
+	An exact cover (Algorithm X with dancing links) backend for sudoku variants.
+
+	The exact cover matrix is generated from a unit list, so the diagonal sudoku
+	of `solution.py` and any other variant whose units hold one of each digit
+	work the same way.  Each row places a digit in a box and each column is a
+	constraint that must be covered exactly once: every box holds one digit and
+	every unit holds every digit once.
+
+	The links are kept in flat integer lists (left, right, up, down, column) and
+	the matrix is built once per unit list, then restored after every puzzle, so
+	the solvers only pay for the search.  Besides `solve(grid)`, the backend can
+	enumerate (`solutions`) and count (`count`) the solutions, e.g. to check that
+	a puzzle has a unique solution (`is_unique`).
+'''
+
+from solution import boxes, unitlist
+
+DIGITS = '123456789'
+
+
+
+class DancingLinks():
+	'''
+		The exact cover matrix of the sudoku variant defined by `units`, over the
+		given boxes and digits.  A matrix runs one search at a time.
+	'''
+	def __init__(self, units=unitlist, boxes=boxes, digits=DIGITS):
+		self.boxes  = list(boxes)
+		self.digits = digits
+		columns = [('box', box) for box in self.boxes] + \
+			[('unit', u, d) for u in range(len(units)) for d in digits]
+		column_index = dict((column, i + 1) for i, column in enumerate(columns))
+		units_of = dict((box, [u for u, unit in enumerate(units) if box in unit]) for box in self.boxes)
+
+		# node 0 is the root and nodes 1..len(columns) are the column headers
+		n = len(columns) + 1
+		self.L = [i - 1 for i in range(n)]
+		self.R = [i + 1 for i in range(n)]
+		self.L[0], self.R[-1] = n - 1, 0
+		self.U = list(range(n))
+		self.D = list(range(n))
+		self.C = list(range(n))
+		self.S = [0] * n
+		self.row_of = [None] * n
+		self.first  = {}
+
+		for box in self.boxes:
+			for d in digits:
+				row = [column_index[('box', box)]] + [column_index[('unit', u, d)] for u in units_of[box]]
+				self._add_row((box, d), row)
+
+	def _add_row(self, label, row):
+		'''
+			Append a row covering the given columns.
+		'''
+		L, R, U, D, C = self.L, self.R, self.U, self.D, self.C
+		start = len(L)
+		for k, c in enumerate(row):
+			node = start + k
+			L.append(node - 1 if k else start + len(row) - 1)
+			R.append(node + 1 if k < len(row) - 1 else start)
+			U.append(U[c])
+			D.append(c)
+			C.append(c)
+			D[U[c]] = node
+			U[c] = node
+			self.S[c] += 1
+			self.row_of.append(label)
+		self.first[label] = start
+
+	def _cover(self, c):
+		L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+		R[L[c]] = R[c]
+		L[R[c]] = L[c]
+		i = D[c]
+		while i != c:
+			j = R[i]
+			while j != i:
+				D[U[j]] = D[j]
+				U[D[j]] = U[j]
+				S[C[j]] -= 1
+				j = R[j]
+			i = D[i]
+
+	def _uncover(self, c):
+		L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+		i = U[c]
+		while i != c:
+			j = L[i]
+			while j != i:
+				S[C[j]] += 1
+				D[U[j]] = j
+				U[D[j]] = j
+				j = L[j]
+			i = U[i]
+		R[L[c]] = c
+		L[R[c]] = c
+
+	def _choose(self):
+		'''
+			Return the uncovered column with the fewest rows (0 if none is left).
+		'''
+		R, S = self.R, self.S
+		best, size = 0, None
+		c = R[0]
+		while c:
+			if size is None or S[c] < size:
+				best, size = c, S[c]
+				if size < 2:
+					break
+			c = R[c]
+		return best
+
+	def _select(self, grid):
+		'''
+			Cover the columns of the rows of the given digits.  Return the list of
+			the covered columns, or None if two givens conflict.
+		'''
+		L, R, C = self.L, self.R, self.C
+		covered = []
+		for box, d in zip(self.boxes, grid):
+			if d not in self.digits:
+				continue
+			node = self.first[(box, d)]
+			j = node
+			while True:
+				c = C[j]
+				if R[L[c]] != c:
+					self._restore(covered)
+					return None
+				self._cover(c)
+				covered.append(c)
+				j = R[j]
+				if j == node:
+					break
+		return covered
+
+	def _restore(self, covered):
+		for c in reversed(covered):
+			self._uncover(c)
+
+	def _search(self, partial):
+		'''
+			Yield the lists of row labels completing `partial`.
+		'''
+		c = self._choose()
+		if not c:
+			yield list(partial)
+			return
+		R, L, D, C = self.R, self.L, self.D, self.C
+		self._cover(c)
+		try:
+			r = D[c]
+			while r != c:
+				partial.append(self.row_of[r])
+				j = R[r]
+				while j != r:
+					self._cover(C[j])
+					j = R[j]
+				try:
+					for found in self._search(partial):
+						yield found
+				finally:
+					j = L[r]
+					while j != r:
+						self._uncover(C[j])
+						j = L[j]
+					partial.pop()
+				r = D[r]
+		finally:
+			self._uncover(c)
+
+	def _count(self, limit):
+		'''
+			Return the number of exact covers of the remaining columns, stopping
+			at `limit` (if not None).
+		'''
+		c = self._choose()
+		if not c:
+			return 1
+		R, L, D, C = self.R, self.L, self.D, self.C
+		total = 0
+		self._cover(c)
+		r = D[c]
+		while r != c:
+			j = R[r]
+			while j != r:
+				self._cover(C[j])
+				j = R[j]
+			total += self._count(None if limit is None else limit - total)
+			j = L[r]
+			while j != r:
+				self._uncover(C[j])
+				j = L[j]
+			if limit is not None and total >= limit:
+				break
+			r = D[r]
+		self._uncover(c)
+		return total
+
+	def solutions(self, grid):
+		'''
+			Yield every solution of the grid string as a values dictionary.
+		'''
+		grid = [c for c in grid if c in self.digits or c == '.']
+		covered = self._select(grid)
+		if covered is None:
+			return
+		try:
+			for rows in self._search([]):
+				values = dict((box, d) for box, d in zip(self.boxes, grid) if d in self.digits)
+				values.update(rows)
+				yield values
+		finally:
+			self._restore(covered)
+
+	def count(self, grid, limit=None):
+		'''
+			Return the number of solutions of the grid string, or `limit` if it has
+			at least that many.
+		'''
+		grid = [c for c in grid if c in self.digits or c == '.']
+		covered = self._select(grid)
+		if covered is None:
+			return 0
+		try:
+			return self._count(limit)
+		finally:
+			self._restore(covered)
+
+
+
+_matrices = {}
+
+def matrix(units=unitlist):
+	'''
+		Return the (cached) exact cover matrix of a unit list.
+	'''
+	key = tuple(tuple(unit) for unit in units)
+	if key not in _matrices:
+		_matrices[key] = DancingLinks(units)
+	return _matrices[key]
+
+
+
+def solutions(grid, units=unitlist):
+	'''
+		Yield every solution of the grid string as a values dictionary.
+	'''
+	return matrix(units).solutions(grid)
+
+
+
+def solve(grid, units=unitlist):
+	'''
+		Return the first solution of the grid string, or False if it has none.
+	'''
+	found = solutions(grid, units)
+	try:
+		return next(found, False)
+	finally:
+		found.close()
+
+
+
+def count(grid, units=unitlist, limit=None):
+	'''
+		Return the number of solutions of the grid string (at most `limit`).
+	'''
+	return matrix(units).count(grid, limit)
+
+
+
+def is_unique(grid, units=unitlist):
+	'''
+		Return True if the grid string has exactly one solution.
+	'''
+	return count(grid, units, limit=2) == 1
@@ -0,0 +1,242 @@
+'''
+	A registry of the advanced inference strategies of the array engine
+	(`sudoku_array.py`), run by the search whenever constraint propagation stalls.
+
+	Every strategy takes the list of candidate masks, removes the candidates it
+	can prove impossible and returns a dictionary of the changed boxes and their
+	previous masks (a box left without candidates is a contradiction).
+	Strategies are tried in order (the presumed cheapest first in `DEFAULT`),
+	and the first one that changes anything hands the changes back to
+	propagation before the next round, so the costly strategies only run on
+	grids the cheap ones cannot advance.
+
+	The counters record, per strategy, the number of calls, the number of calls
+	that removed candidates (hits) and the number of candidates removed, so the
+	strategies can be weighed against their cost:
+
+		import sudoku_strategies
+		sudoku_strategies.solve(grid)
+		sudoku_strategies.report()
+'''
+
+from collections import Counter, OrderedDict
+from itertools import combinations
+
+import sudoku_array
+from solution import row_units, column_units
+from sudoku_array import ALL, bit_count, index, unit_index
+
+strategies   = OrderedDict()
+calls        = Counter()
+hits         = Counter()
+eliminations = Counter()
+
+rows_index    = [tuple(index[box] for box in unit) for unit in row_units]
+columns_index = [tuple(index[box] for box in unit) for unit in column_units]
+
+# Pairs of units overlapping in at least two boxes (a square with a row, a column
+# or a diagonal): a digit confined to the overlap in one unit is excluded from the
+# rest of the other.
+overlaps = [(a, b, tuple(i for i in a if i in b)) for a in unit_index for b in unit_index
+			if a != b and len(set(a) & set(b)) > 1]
+
+digit_bits = [1 << d for d in range(9)]
+
+
+
+def strategy(name):
+	'''
+		Register a strategy function under `name`.
+	'''
+	def register(fn):
+		strategies[name] = fn
+		return fn
+	return register
+
+
+
+def clear(cells, i, bits, changed):
+	'''
+		Remove the candidates `bits` from box `i`, recording its previous mask.
+	'''
+	if cells[i] & bits:
+		changed.setdefault(i, cells[i])
+		cells[i] &= ~bits
+
+
+
+def places(cells, unit):
+	'''
+		Return, for every digit, the mask of the positions of the unit where it
+		is possible.
+	'''
+	result = [0] * 9
+	for position, i in enumerate(unit):
+		mask = cells[i]
+		for d in range(9):
+			if mask >> d & 1:
+				result[d] |= 1 << position
+	return result
+
+
+
+def hidden_subsets(cells, size):
+	'''
+		Find `size` digits possible in exactly `size` boxes of a unit, and remove
+		every other candidate from those boxes.
+	'''
+	changed = {}
+	for unit in unit_index:
+		digit_places = places(cells, unit)
+		digits = [d for d in range(9) if 1 < bit_count[digit_places[d]] <= size]
+		for subset in combinations(digits, size):
+			positions = 0
+			for d in subset:
+				positions |= digit_places[d]
+			if bit_count[positions] == size:
+				keep = sum(digit_bits[d] for d in subset)
+				for position, i in enumerate(unit):
+					if positions >> position & 1:
+						clear(cells, i, ALL & ~keep, changed)
+	return changed
+
+
+
+@strategy('hidden pairs')
+def hidden_pairs(cells):
+	return hidden_subsets(cells, 2)
+
+
+
+@strategy('hidden triples')
+def hidden_triples(cells):
+	return hidden_subsets(cells, 3)
+
+
+
+@strategy('naked triples')
+def naked_triples(cells):
+	'''
+		Find three boxes of a unit whose candidates are three digits in total,
+		and remove those digits from the other boxes of the unit.
+	'''
+	changed = {}
+	for unit in unit_index:
+		open_boxes = [i for i in unit if 1 < bit_count[cells[i]] <= 3]
+		for triple in combinations(open_boxes, 3):
+			digits = cells[triple[0]] | cells[triple[1]] | cells[triple[2]]
+			if bit_count[digits] == 3:
+				for i in unit:
+					if i not in triple:
+						clear(cells, i, digits, changed)
+	return changed
+
+
+
+@strategy('pointing pairs')
+def pointing_pairs(cells):
+	'''
+		Pointing pairs and box/line reduction: a digit whose places in one unit
+		all lie in its overlap with another unit is removed from the rest of the
+		other unit.
+	'''
+	changed = {}
+	for a, b, overlap in overlaps:
+		inside = outside = 0
+		for i in a:
+			if i in overlap:
+				inside |= cells[i]
+			else:
+				outside |= cells[i]
+		confined = inside & ~outside
+		if confined:
+			for i in b:
+				if i not in overlap:
+					clear(cells, i, confined, changed)
+	return changed
+
+
+
+@strategy('x-wing')
+def x_wing(cells):
+	'''
+		X-wing: a digit possible in the same two columns of two rows (exactly
+		two places in each) is removed from the other boxes of those columns,
+		and the same with rows and columns swapped.
+	'''
+	changed = {}
+	for lines, crosses in ((rows_index, columns_index), (columns_index, rows_index)):
+		line_places = [places(cells, line) for line in lines]
+		for d in range(9):
+			pairs = {}
+			for number, digit_places in enumerate(line_places):
+				if bit_count[digit_places[d]] == 2:
+					pairs.setdefault(digit_places[d], []).append(number)
+			for positions, numbers in pairs.items():
+				if len(numbers) != 2:
+					continue
+				for position in range(9):
+					if positions >> position & 1:
+						for number, i in enumerate(crosses[position]):
+							if number not in numbers:
+								clear(cells, i, digit_bits[d], changed)
+	return changed
+
+
+
+# Ordered by a rough guess of the cost of each strategy, not by measurements
+DEFAULT = ['naked triples', 'pointing pairs', 'hidden pairs', 'x-wing', 'hidden triples']
+
+
+
+def inference(names=None):
+	'''
+		Return an `infer(cells)` function for `sudoku_array.search` that tries
+		the named strategies (all of them by default) in order, and returns the
+		boxes changed by the first one that changes anything.
+	'''
+	names = DEFAULT if names is None else names
+	for name in names:
+		if name not in strategies:
+			raise ValueError('Unknown strategy: {}'.format(name))
+
+	def infer(cells):
+		for name in names:
+			calls[name] += 1
+			changed = strategies[name](cells)
+			if changed:
+				hits[name] += 1
+				eliminations[name] += sum(bit_count[mask] - bit_count[cells[i]] for i, mask in changed.items())
+				if any(cells[i] == 0 for i in changed):
+					return False
+				return list(changed)
+		return []
+	return infer
+
+
+
+def solve(grid, names=None, naked=True):
+	'''
+		Solve a diagonal sudoku with the array engine and the named strategies.
+	'''
+	return sudoku_array.solve(grid, naked, inference(names))
+
+
+
+def reset_counters():
+	'''
+		Reset the strategy and search node counters.
+	'''
+	for counter in (calls, hits, eliminations, sudoku_array.counters):
+		counter.clear()
+
+
+
+def report():
+	'''
+		Print the strategy counters and the number of search nodes.
+	'''
+	print('{:<16}{:>10}{:>10}{:>14}'.format('Strategy', 'Calls', 'Hits', 'Eliminations'))
+	for name in strategies:
+		print('{:<16}{:>10}{:>10}{:>14}'.format(name, calls[name], hits[name], eliminations[name]))
+	print('Search nodes: {}'.format(sudoku_array.counters['nodes']))
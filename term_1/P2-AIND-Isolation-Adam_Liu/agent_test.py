@@ -3,12 +3,34 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import csv
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 
 import isolation
+import benchmark
 import game_agent
+import competition_agent
+from isolation import symmetry
+import sample_players
 
 from importlib import reload
+from batch_eval import evaluate_boards
+from endgame import EndgameSolver, raw_state
+from mcts import MCTSPlayer
+from opening_book import OpeningBook, build_book
+from move_ordering import MoveOrdering
+from search_stats import SearchStats, dump_csv, dump_json
+from time_manager import TimeManager
+import tournament
+import tournament_stats
 
 
 class IsolationTest(unittest.TestCase):
@@ -21,5 +43,663 @@ class IsolationTest(unittest.TestCase):
         self.game = isolation.Board(self.player1, self.player2)
 
 
+class BitBoardTest(unittest.TestCase):
+    """BitBoard must follow the same rules as the reference Board"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def assertSameState(self, board, bitboard):
+        self.assertEqual(board.active_player, bitboard.active_player)
+        self.assertEqual(board.move_count, bitboard.move_count)
+        self.assertEqual(board.get_blank_spaces(), bitboard.get_blank_spaces())
+        self.assertEqual(board.to_string(), bitboard.to_string())
+        self.assertEqual(board.bit_state(), bitboard.bit_state())
+        for player in (self.player1, self.player2):
+            self.assertEqual(board.get_player_location(player),
+                             bitboard.get_player_location(player))
+            self.assertEqual(sorted(board.get_legal_moves(player)),
+                             sorted(bitboard.get_legal_moves(player)))
+            self.assertEqual(board.utility(player), bitboard.utility(player))
+            self.assertEqual(board.is_winner(player), bitboard.is_winner(player))
+            self.assertEqual(board.is_loser(player), bitboard.is_loser(player))
+
+    def test_random_games(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 8)]:
+            for _ in range(20):
+                board = isolation.Board(self.player1, self.player2, width, height)
+                bitboard = isolation.BitBoard(self.player1, self.player2, width, height)
+                self.assertSameState(board, bitboard)
+                while True:
+                    moves = sorted(board.get_legal_moves())
+                    if not moves:
+                        break
+                    move = rng.choice(moves)
+                    self.assertTrue(bitboard.move_is_legal(move))
+                    forecast = bitboard.forecast_move(move)
+                    board.apply_move(move)
+                    bitboard.apply_move(move)
+                    self.assertSameState(board, bitboard)
+                    self.assertEqual(forecast.hash(), bitboard.hash())
+
+    def test_forecast_does_not_modify_board(self):
+        bitboard = isolation.BitBoard(self.player1, self.player2)
+        bitboard.apply_move((2, 3))
+        bitboard.apply_move((0, 5))
+        before = bitboard.to_string()
+        new_game = bitboard.forecast_move((0, 2))
+        self.assertEqual(before, bitboard.to_string())
+        self.assertNotEqual(before, new_game.to_string())
+        self.assertEqual(self.player1, bitboard.active_player)
+        self.assertEqual(self.player2, new_game.active_player)
+
+    def test_undo_move(self):
+        rng = random.Random(1)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class(self.player1, self.player2)
+            snapshots = []
+            while game.get_legal_moves():
+                snapshots.append((game.to_string(), game.active_player, game.move_count,
+                                  sorted(game.get_legal_moves(self.player1)),
+                                  sorted(game.get_legal_moves(self.player2))))
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            while snapshots:
+                game.undo_move()
+                self.assertEqual(snapshots.pop(),
+                                 (game.to_string(), game.active_player, game.move_count,
+                                  sorted(game.get_legal_moves(self.player1)),
+                                  sorted(game.get_legal_moves(self.player2))))
+            self.assertRaises(RuntimeError, game.undo_move)
+
+    def test_zobrist_hash(self):
+        blocked, positions, side = isolation.zobrist.zobrist_keys(7, 7)
+        rng = random.Random(4)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class(self.player1, self.player2)
+            hashes = []
+            while game.get_legal_moves():
+                # the incremental hash only depends on the current state
+                expected = 0
+                for r, c in set((r, c) for r in range(7) for c in range(7)) - set(game.get_blank_spaces()):
+                    expected ^= blocked[r + 7 * c]
+                for seat, player in enumerate((self.player1, self.player2)):
+                    loc = game.get_player_location(player)
+                    if loc is not None:
+                        expected ^= positions[seat][loc[0] + 7 * loc[1]]
+                if game.active_player == self.player2:
+                    expected ^= side
+                self.assertEqual(expected, game.hash())
+                hashes.append(game.hash())
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            while hashes:
+                game.undo_move()
+                self.assertEqual(hashes.pop(), game.hash())
+
+
+class AlphaBetaTest(unittest.TestCase):
+    """The search extensions of AlphaBetaPlayer must not change the minimax
+    value found by a fixed-depth search"""
+
+    def setUp(self):
+        self.player2 = "Player2"
+
+    def play_opening(self, players, num_moves, seed):
+        rng = random.Random(seed)
+        games = [isolation.BitBoard(player, self.player2) for player in players]
+        for _ in range(num_moves):
+            move = rng.choice(games[0].get_legal_moves())
+            for game in games:
+                game.apply_move(move)
+        for player in players:
+            player.time_left = lambda: float("inf")
+        return games
+
+    def test_in_place_search(self):
+        results = []
+        for in_place in (False, True):
+            player = game_agent.AlphaBetaPlayer(in_place=in_place)
+            game, = self.play_opening([player], 2, 0)
+            before = game.to_string()
+            results.append([player.alphabeta(player.search_board(game), depth)
+                            for depth in range(1, 5)])
+            self.assertEqual(before, game.to_string())
+        self.assertEqual(results[0], results[1])
+
+    def test_transposition_table_search(self):
+        for seed in range(5):
+            plain = game_agent.AlphaBetaPlayer()
+            cached = game_agent.AlphaBetaPlayer(tt_size=2**12)
+            game, mirror = self.play_opening([plain, cached], 6 + 2 * seed, seed)
+            cached.tt.new_search()
+            for depth in range(1, 6):
+                self.assertEqual(plain.ab_max_value(game, depth)[0],
+                                 cached.ab_max_value(mirror, depth)[0])
+            self.assertGreater(cached.tt.hits, 0)
+
+    def test_symmetric_transposition_table(self):
+        hits = []
+        for tt_symmetry in (False, True):
+            plain = game_agent.AlphaBetaPlayer()
+            cached = game_agent.AlphaBetaPlayer(tt_size=2**14, tt_symmetry=tt_symmetry)
+            game, mirror = self.play_opening([plain, cached], 0, 0)
+            cached.tt.new_search()
+            for depth in range(1, 4):
+                value, move = cached.ab_max_value(mirror, depth)
+                self.assertEqual(plain.ab_max_value(game, depth)[0], value)
+                self.assertIn(move, mirror.get_legal_moves())
+            hits.append(cached.tt.hits)
+        self.assertGreater(hits[1], hits[0])
+
+    def test_symmetric_transposition_table_board(self):
+        # the reference Board provides the raw state the symmetries need
+        plain = game_agent.AlphaBetaPlayer()
+        cached = game_agent.AlphaBetaPlayer(tt_size=2**14, tt_symmetry=True)
+        game, = self.play_opening([plain], 0, 0)
+        board = isolation.Board(cached, self.player2)
+        cached.time_left = lambda: float("inf")
+        cached.tt.new_search()
+        for depth in range(1, 4):
+            value, move = cached.ab_max_value(board, depth)
+            self.assertEqual(plain.ab_max_value(game, depth)[0], value)
+            self.assertIn(move, board.get_legal_moves())
+        self.assertGreater(cached.tt.hits, 0)
+
+    def test_symmetric_transposition_table_asymmetric_score(self):
+        score_fn = sample_players.center_score
+        with self.assertRaises(ValueError):
+            game_agent.AlphaBetaPlayer(score_fn=score_fn, tt_size=2**14, tt_symmetry=True)
+
+        # mirrored openings have different center scores, so they cannot share
+        # transposition table entries
+        plain = game_agent.AlphaBetaPlayer(score_fn=score_fn)
+        cached = game_agent.AlphaBetaPlayer(score_fn=score_fn, tt_size=2**14)
+        cached.tt.new_search()
+        values = []
+        for opening in ((0, 0), (6, 6)):
+            game, mirror = self.play_opening([plain, cached], 0, 0)
+            for move in (opening, (3, 3)):
+                game.apply_move(move)
+                mirror.apply_move(move)
+            values.append(plain.ab_max_value(game, 2)[0])
+            self.assertEqual(values[-1], cached.ab_max_value(mirror, 2)[0])
+        self.assertNotEqual(values[0], values[1])
+
+    def test_move_ordering(self):
+        nodes = []
+        for config in (dict(pv=False, killers=0, history=False, mobility=False), {}):
+            nodes.append(0)
+            for seed in range(4):
+                plain = game_agent.AlphaBetaPlayer()
+                ordered = game_agent.AlphaBetaPlayer(move_ordering=MoveOrdering(**config))
+                game, mirror = self.play_opening([plain, ordered], 4, seed)
+                ordered.ordering.new_search()
+                for depth in range(1, 7):
+                    ordered.alphabeta(mirror, depth)
+                nodes[-1] += ordered.ordering.nodes
+                self.assertGreater(ordered.ordering.cutoffs_per_node(), 0)
+                self.assertEqual(plain.ab_max_value(game, 6)[0],
+                                 ordered.ab_max_value(mirror, 6)[0])
+        self.assertLess(nodes[1], nodes[0])
+
+    def test_principal_variation_search(self):
+        for seed in range(4):
+            players = [game_agent.AlphaBetaPlayer(move_ordering=MoveOrdering()),
+                       game_agent.AlphaBetaPlayer(move_ordering=MoveOrdering(), pvs=True),
+                       game_agent.AlphaBetaPlayer(move_ordering=MoveOrdering(), aspiration=.5),
+                       game_agent.AlphaBetaPlayer(move_ordering=MoveOrdering(), tt_size=2**12,
+                                                  pvs=True, aspiration=2.)]
+            games = self.play_opening(players, 4 + seed, seed)
+            values = []
+            for player, game in zip(players, games):
+                player.ordering.new_search()
+                value, results = None, []
+                for depth in range(1, 6):
+                    value, _ = player.aspiration_search(game, depth, value)
+                    results.append(value)
+                values.append(results)
+            self.assertEqual(values[0], values[1])
+            self.assertEqual(values[0], values[2])
+            self.assertEqual(values[0], values[3])
+        self.assertGreater(players[1].researches + players[2].researches, 0)
+
+    def test_nodes_per_depth(self):
+        player = game_agent.AlphaBetaPlayer(
+            pvs=True, time_manager=TimeManager(threshold=10., ms_per_node=.05))
+        game, = self.play_opening([player], 2, 3)
+        player.get_move(game, lambda: 150.)
+        nodes = player.nodes_per_depth()
+        self.assertEqual(len(nodes), len(player.timer.iterations) - 1)
+        self.assertEqual(sum(nodes), player.timer.iterations[-1][0])
+        self.assertTrue(all(a < b for a, b in zip(nodes, nodes[1:])))
+
+    def test_virtual_clock(self):
+        results = []
+        for _ in range(2):
+            player = game_agent.AlphaBetaPlayer(
+                time_manager=TimeManager(threshold=10., check_interval=8, ms_per_node=.05))
+            game, = self.play_opening([player], 2, 3)
+            move = player.get_move(game, lambda: 150.)
+            results.append((move, player.timer.nodes, player.timer.iterations))
+        self.assertEqual(results[0], results[1])
+        # the virtual clock expires after (150 - 10) / .05 nodes, checked every 8 nodes
+        self.assertTrue(2800 < results[0][1] <= 2808)
+
+    def test_iteration_prediction(self):
+        player = game_agent.AlphaBetaPlayer(
+            time_manager=TimeManager(threshold=10., predict=True, ms_per_node=.05))
+        game, = self.play_opening([player], 2, 3)
+        player.get_move(game, lambda: 150.)
+        # the search stopped between iterations, before the clock expired
+        self.assertEqual(player.timer.nodes, player.timer.iterations[-1][0])
+        self.assertGreater(player.timer.remaining(None), 10.)
+
+    def test_timer_threshold(self):
+        player = game_agent.AlphaBetaPlayer(time_manager=TimeManager(threshold=20.))
+        self.assertEqual(player.TIMER_THRESHOLD, 20.)
+        player.TIMER_THRESHOLD = 30.
+        self.assertEqual(player.timer.threshold, 30.)
+        player.timer.threshold = 15.
+        self.assertEqual(player.TIMER_THRESHOLD, 15.)
+
+    def test_batch_search(self):
+        for batch_depth in (1, 2, 3):
+            plain = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+            batched = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                 batch_depth=batch_depth)
+            game, mirror = self.play_opening([plain, batched], 2 * batch_depth, batch_depth)
+            for depth in range(1, 6):
+                self.assertEqual(plain.ab_max_value(game, depth),
+                                 batched.ab_max_value(mirror, depth))
+            self.assertGreater(batched.frontier.leaves, 0)
+
+    def test_search_without_numpy(self):
+        # only the batch search needs numpy
+        script = ("import sys; sys.modules['numpy'] = None; import game_agent; "
+                  "game_agent.AlphaBetaPlayer(tt_size=16)")
+        subprocess.run([sys.executable, "-c", script], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    def test_play_with_agents(self):
+        player1 = game_agent.AlphaBetaPlayer()
+        player2 = game_agent.MinimaxPlayer(search_depth=2)
+        game = isolation.BitBoard(player1, player2)
+        winner, history, outcome = game.play(time_limit=50)
+        self.assertIn(winner, (player1, player2))
+        self.assertGreater(len(history), 0)
+
+
+class SymmetryTest(unittest.TestCase):
+    """Symmetric boards must share the same canonical state"""
+
+    def test_canonical(self):
+        for width, height in ((7, 7), (5, 8)):
+            perms = symmetry.permutations(width, height)
+            self.assertEqual(len(perms), 8 if width == height else 4)
+            rng = random.Random(width)
+            for _ in range(5):
+                games = [isolation.BitBoard("Player1", "Player2", width, height) for _ in perms]
+                moves = games[0].get_legal_moves()
+                while moves:
+                    move = rng.choice(moves)
+                    for sym, game in enumerate(games):
+                        image = symmetry.transform_move(move, sym, width, height)
+                        self.assertEqual(symmetry.inverse_move(image, sym, width, height), move)
+                        game.apply_move(image)
+                    blanks = games[0].bit_state()[0]
+                    keys = set()
+                    for sym, game in enumerate(games):
+                        self.assertEqual(symmetry.transform_mask(blanks, sym, width, height),
+                                         game.bit_state()[0])
+                        key, canonical_sym = symmetry.canonical(game)
+                        keys.add(key)
+                        self.assertEqual(symmetry.transform_mask(game.bit_state()[0], canonical_sym,
+                                                                 width, height),
+                                         key & ((1 << width * height) - 1))
+                    self.assertEqual(len(keys), 1)
+                    moves = games[0].get_legal_moves()
+
+
+class BatchEvalTest(unittest.TestCase):
+    """The vectorized heuristics must match the scalar ones"""
+
+    def test_heuristics(self):
+        player1, player2 = "Player1", "Player2"
+        rng = random.Random(0)
+        boards = []
+        for _ in range(50):
+            game = isolation.BitBoard(player1, player2)
+            moves = game.get_legal_moves()
+            while moves:
+                game.apply_move(rng.choice(moves))
+                boards.append(game.copy())
+                moves = game.get_legal_moves()
+
+        heuristics = [sample_players.null_score, sample_players.open_move_score,
+                      sample_players.improved_score, sample_players.center_score,
+                      game_agent.custom_score, game_agent.custom_score_2,
+                      game_agent.custom_score_3]
+        for score_fn in heuristics:
+            for player in (player1, player2):
+                # center_score is undefined before the player's first move
+                scored = [game for game in boards if game.get_player_location(player)]
+                self.assertEqual(list(evaluate_boards(score_fn, scored, player)),
+                                 [score_fn(game, player) for game in scored])
+
+    def test_unknown_heuristic(self):
+        with self.assertRaises(ValueError):
+            game_agent.AlphaBetaPlayer(score_fn=lambda game, player: 0., batch_depth=1)
+
+
+class OpeningBookTest(unittest.TestCase):
+    """The book must return the search results of every orientation of the
+    stored positions"""
+
+    def test_build_save_load(self):
+        book = build_book(max_ply=1, depth=3, score_fn=sample_players.improved_score)
+        # the empty board, and the 10 first moves up to symmetry
+        self.assertEqual(len(book), 11)
+
+        path = os.path.join(tempfile.mkdtemp(), "book.bin")
+        book.save(path)
+        loaded = OpeningBook.load(path)
+        os.remove(path)
+        self.assertEqual((loaded.width, loaded.height, loaded.depth, len(loaded)), (7, 7, 3, 11))
+
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score, book=loaded)
+        for first_move in isolation.BitBoard("Player1", player).get_legal_moves():
+            player.time_left = lambda: float("inf")
+            game = isolation.BitBoard("Player1", player)
+            game.apply_move(first_move)
+            move, value = loaded.probe(game)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(value, player.ab_max_value(game, 3)[0])
+            self.assertEqual(player.get_move(game, lambda: 0.), move)
+            board = isolation.Board("Player1", player)
+            board.apply_move(first_move)
+            self.assertEqual(player.get_move(board, lambda: 0.), move)
+        game.apply_move(move)
+        self.assertIsNone(loaded.probe(game))
+
+    def test_value_precision(self):
+        game = isolation.BitBoard("Player1", "Player2")
+        book = OpeningBook()
+        book.add(symmetry.canonical(game)[0], 24, .1)
+        path = os.path.join(tempfile.mkdtemp(), "book.bin")
+        book.save(path)
+        loaded = OpeningBook.load(path)
+        os.remove(path)
+        self.assertEqual(((3, 3), .1), loaded.probe(game))
+
+    def test_asymmetric_score(self):
+        with self.assertRaises(ValueError):
+            build_book(max_ply=0, depth=1, score_fn=sample_players.center_score)
+
+
+class EndgameTest(unittest.TestCase):
+    """The endgame solver must agree with an exhaustive search"""
+
+    def test_partitioned_positions(self):
+        solver = EndgameSolver()
+        rng = random.Random(0)
+        solved = 0
+        while solved < 10:
+            player = game_agent.AlphaBetaPlayer(score_fn=sample_players.null_score)
+            player.time_left = lambda: float("inf")
+            game = isolation.BitBoard(player, "Player2")
+            moves = game.get_legal_moves()
+            while moves and (game.active_player != player or not solver.partitioned(game)):
+                game.apply_move(rng.choice(moves))
+                moves = game.get_legal_moves()
+            solution = solver.solve(game) if moves else None
+            if solution is None:
+                continue
+            value, move = solution
+            depth = len(game.get_blank_spaces()) + 1
+            self.assertEqual(value, player.ab_max_value(game, depth)[0])
+            self.assertIn(move, moves)
+            solved += 1
+        self.assertEqual(solver.solved, 10)
+
+    def test_time_limit(self):
+        player = game_agent.AlphaBetaPlayer(endgame=EndgameSolver(max_nodes=10**9, check_interval=64))
+        # a partitioned position that takes millions of nodes to solve
+        rng = random.Random(8)
+        game = isolation.BitBoard(player, "Player2")
+        while not player.endgame.partitioned(game):
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        if game.active_player != player:
+            game.apply_move(game.get_legal_moves()[0])
+
+        # every reading of the clock takes one millisecond
+        clock = [150.]
+        def time_left():
+            clock[0] -= 1.
+            return clock[0]
+
+        self.assertIsNone(player.endgame.solve(game, time_left, 10.))
+        self.assertEqual(player.endgame.aborted, 1)
+        # the solver gave up with half of the time above the threshold left
+        self.assertGreater(clock[0], 75.)
+
+    def test_give_up(self):
+        player = game_agent.AlphaBetaPlayer(endgame=EndgameSolver(max_nodes=20))
+        # the opponent is left with a 14 cell region, too large for 20 nodes
+        rng = random.Random(16)
+        game = isolation.BitBoard(player, "Player2")
+        while not player.endgame.partitioned(game):
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        if game.active_player != player:
+            game.apply_move(game.get_legal_moves()[0])
+        start = game.copy()
+
+        # the solver gives up, skips the next move as the region only lost
+        # one cell, and solves the move after that
+        counts = []
+        for _ in range(3):
+            move = player.get_move(game, lambda: 1000.)
+            self.assertIn(move, game.get_legal_moves())
+            endgame = player.endgame
+            counts.append((endgame.aborted, endgame.skipped, endgame.solved))
+            game.apply_move(move)
+            game.apply_move(game.get_legal_moves()[0])
+        self.assertEqual([(1, 0, 0), (1, 1, 0), (1, 1, 1)], counts)
+
+        # a new game starts without the regions given up on
+        player.endgame.max_nodes = 10**6
+        self.assertIsNotNone(player.endgame.solve(start))
+        self.assertEqual(player.endgame.skipped, 1)
+
+
+class MCTSTest(unittest.TestCase):
+    """Monte Carlo tree search agents"""
+
+    def countdown(self, iterations):
+        # a clock that expires after a fixed number of reads
+        calls = itertools.count()
+        return lambda: iterations - next(calls)
+
+    def test_play_with_agents(self):
+        player1 = MCTSPlayer(seed=0)
+        player2 = competition_agent.CustomPlayer(timeout=10.)
+        for game in (isolation.Board(player1, player2), isolation.BitBoard(player2, player1)):
+            # the agents must play legal moves until the end of the game,
+            # and return before their clock runs out
+            while game.get_legal_moves():
+                time_left = self.countdown(200)
+                move = game.active_player.get_move(game.copy(), time_left)
+                self.assertIn(move, game.get_legal_moves())
+                self.assertGreaterEqual(time_left(), 0)
+                game.apply_move(move)
+            self.assertTrue(game.is_loser(game.active_player))
+
+    def test_tree_reuse(self):
+        player = MCTSPlayer(timeout=0., seed=0)
+        game = isolation.BitBoard(player, "Player2")
+        game.apply_move(player.get_move(game, self.countdown(500)))
+        node, _ = player._next
+        reply = max(node.children, key=lambda child: child.visits)
+        game.apply_move(player.search.coords[reply.move])
+
+        blanks, active_loc, inactive_loc = raw_state(game)
+        root = player._reused_root(blanks, (active_loc, inactive_loc))
+        self.assertIs(root, reply)
+        visits = root.visits
+        self.assertGreater(visits, 0)
+        self.assertIn(player.get_move(game, self.countdown(500)), game.get_legal_moves())
+        self.assertEqual(root.visits, visits + 501)
+
+    def test_root_parallel(self):
+        player = MCTSPlayer(processes=1, seed=0)
+        game = isolation.BitBoard(player, "Player2")
+        try:
+            for time_limit in (1000., 100.):
+                start = time.perf_counter()
+                move = player.get_move(game, lambda: time_limit - 1000 * (time.perf_counter() - start))
+                self.assertIn(move, game.get_legal_moves())
+                self.assertLess(time.perf_counter() - start, time_limit / 1000.)
+        finally:
+            player.close()
+
+
+class SearchStatsTest(unittest.TestCase):
+    """Search statistics collected by the agents"""
+
+    def test_alphabeta_stats(self):
+        player = game_agent.AlphaBetaPlayer(
+            tt_size=2**12, time_manager=TimeManager(threshold=10., ms_per_node=.05))
+        game = isolation.BitBoard(player, "Player2")
+        for move in ((3, 3), (2, 1)):
+            game.apply_move(move)
+        player.get_move(game, lambda: 150.)
+        summary = player.stats.summary()
+        self.assertEqual(summary["moves"], 1)
+        self.assertEqual(summary["nodes"], player.timer.nodes)
+        self.assertEqual(summary["max_depth"], len(player.timer.iterations) - 1)
+        self.assertEqual(summary["aborted"], 1)
+        self.assertEqual(summary["cutoffs"], sum(summary["cutoffs_by_index"]))
+        self.assertGreater(summary["cutoffs"], 0)
+        self.assertGreater(summary["tt_hits"], 0)
+
+        # a search that reaches the end of the game is not aborted
+        player = game_agent.AlphaBetaPlayer()
+        game = isolation.BitBoard(player, "Player2", 4, 4)
+        for move in ((0, 0), (3, 3), (1, 2), (2, 1)):
+            game.apply_move(move)
+        player.get_move(game, lambda: 1000.)
+        self.assertEqual(player.stats.aborted, 0)
+
+    def test_minimax_stats(self):
+        player = game_agent.MinimaxPlayer(search_depth=2)
+        game = isolation.BitBoard(player, "Player2")
+        player.get_move(game, lambda: 1000.)
+        player.get_move(game, lambda: 0.)
+        self.assertEqual(player.stats.depths, [2, 0])
+        self.assertEqual(player.stats.aborted, 1)
+
+    def test_merge_and_dump(self):
+        totals = SearchStats()
+        records = []
+        for match in range(2):
+            stats = SearchStats()
+            stats.start_move(lambda: 150.)
+            stats.record_cutoff(0)
+            stats.record_cutoff(match + 1)
+            stats.end_move(lambda: 50., 1000, 3 + match)
+            totals.merge(SearchStats.from_dict(stats.to_dict()))
+            records.append({"match": match, "agent": "AB", "stats": stats.summary()})
+
+        summary = totals.summary()
+        self.assertEqual(summary["nodes_per_sec"], 10000.)
+        self.assertEqual(summary["mean_depth"], 3.5)
+        self.assertEqual(summary["cutoffs_by_index"], [2, 1, 1])
+        self.assertEqual(summary["first_move_cutoff_rate"], .5)
+
+        directory = tempfile.mkdtemp()
+        dump_json(records, os.path.join(directory, "stats.json"), {"AB": summary})
+        with open(os.path.join(directory, "stats.json")) as f:
+            self.assertEqual(json.load(f)["totals"]["AB"], summary)
+        dump_csv(records, os.path.join(directory, "stats.csv"))
+        with open(os.path.join(directory, "stats.csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["max_depth"] for row in rows], ["3", "4"])
+        self.assertEqual(rows[1]["cutoffs_by_index"], "1 0 1")
+
+
+class BenchmarkTest(unittest.TestCase):
+    """Benchmark harness over the recorded position corpus"""
+
+    def test_corpus(self):
+        with open(benchmark.CORPUS) as f:
+            corpus = json.load(f)
+        player = game_agent.AlphaBetaPlayer()
+        for game in benchmark.load_positions(corpus, player):
+            self.assertIs(game.active_player, player)
+            self.assertTrue(game.get_legal_moves())
+
+        # the recorded corpus is reproducible
+        recorded = benchmark.record_corpus(1, seed=corpus["seed"])
+        self.assertEqual(recorded["positions"], corpus["positions"][:len(recorded["positions"])])
+
+        # the corpus is written with one position per line
+        with tempfile.TemporaryFile("w+") as f:
+            benchmark.write_corpus(recorded, f)
+            f.seek(0)
+            self.assertEqual(len(f.readlines()), len(recorded["positions"]) + 2)
+            f.seek(0)
+            self.assertEqual(json.load(f), recorded)
+
+    def test_benchmark(self):
+        with open(benchmark.CORPUS) as f:
+            corpus = json.load(f)
+        corpus["positions"] = corpus["positions"][:4]
+        results = {config: benchmark.benchmark(config, corpus, depth=3)
+                   for config in ("MM_Open", "AB_Custom")}
+        # node counts do not depend on the board implementation
+        self.assertEqual(benchmark.benchmark("MM_Open", corpus, 3, isolation.Board)["nodes"],
+                         results["MM_Open"]["nodes"])
+        self.assertLess(results["AB_Custom"]["nodes"], results["MM_Open"]["nodes"])
+        self.assertGreater(results["MM_Open"]["branching_factor"], 1.)
+
+        changes = benchmark.compare(results, {"MM_Open": results["MM_Open"]})
+        self.assertEqual(list(changes), ["MM_Open"])
+        self.assertEqual(set(changes["MM_Open"].values()), {0.})
+
+
+class TournamentStatsTest(unittest.TestCase):
+    """Ratings and stopping rule of the adaptive tournament"""
+
+    def test_elo(self):
+        self.assertEqual(0., tournament_stats.elo(.5))
+        self.assertAlmostEqual(190.85, tournament_stats.elo(.75), places=2)
+        self.assertEqual(tournament_stats.MAX_ELO, tournament_stats.elo(1.))
+        rating, low, high = tournament_stats.elo_interval(30, 40)
+        self.assertLess(low, rating)
+        self.assertLess(rating, high)
+
+    def test_wilson_interval(self):
+        low, high = tournament_stats.wilson_interval(0, 10)
+        self.assertEqual(0., low)
+        self.assertGreater(high, 0.)
+        low, high = tournament_stats.wilson_interval(50, 100)
+        self.assertAlmostEqual(.5, (low + high) / 2)
+        self.assertLess(high - low, .2)
+
+    def test_compare(self):
+        reference = [.5, 1., .5, 0., .5, 1., .5, .5]
+        self.assertEqual(0, tournament_stats.compare(reference, reference)[2])
+        self.assertEqual(1, tournament_stats.compare([1.] * 8, reference)[2])
+        self.assertEqual(-1, tournament_stats.compare([0.] * 8, reference)[2])
+        self.assertEqual(0, tournament_stats.compare([1.] * 8, reference, min_samples=10)[2])
+
+    def test_opponents(self):
+        args = tournament.parse_args(["--opponents", "Random", "AB_Open", "-n", "2"])
+        self.assertEqual(["Random", "AB_Open"], args.opponents)
+        self.assertEqual(2, args.matches)
+        with self.assertRaises(ValueError):
+            tournament.main(tournament.parse_args(["--opponents", "MM_Random"]))
+
+
 if __name__ == '__main__':
     unittest.main()
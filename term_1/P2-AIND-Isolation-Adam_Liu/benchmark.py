@@ -0,0 +1,277 @@
+"""Benchmark the search throughput of the Isolation agents on a fixed corpus of
+recorded positions.
+
+The corpus (`benchmark_positions.json`) holds positions sampled from games
+between alpha-beta agents running on a virtual clock, so it can be recorded
+again identically with `--record`.  Each position is stored as the list of
+moves played from the empty board.
+
+Every player/heuristic configuration runs an iterative deepening search to a
+fixed depth on every position, without time limit, and the benchmark reports
+for each configuration:
+
+    - the number of nodes searched per second,
+    - the mean time to complete the iteration at the maximum depth,
+    - the effective branching factor: the ratio of the nodes searched by the
+      last iteration to the nodes searched by the one before it, over the
+      whole corpus.
+
+Node counts do not depend on the machine, so a change of node count between
+two runs means that the search itself changed, while a change of speed at the
+same node count comes from the board or the heuristics.  Results can be saved
+as a baseline and compared run over run:
+
+    python benchmark.py --save       # writes benchmark_baseline.json
+    python benchmark.py --compare    # compares with benchmark_baseline.json
+"""
+import argparse
+import json
+import os
+import random
+
+from time import perf_counter
+
+from isolation import Board, BitBoard
+from sample_players import open_move_score, improved_score, center_score
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
+                        custom_score_2, custom_score_3)
+from move_ordering import MoveOrdering
+from time_manager import TimeManager
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_positions.json")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEPTH = 6
+
+# Player/heuristic configurations, by name
+CONFIGS = {
+    "MM_Open": lambda: MinimaxPlayer(score_fn=open_move_score),
+    "MM_Improved": lambda: MinimaxPlayer(score_fn=improved_score),
+    "AB_Center": lambda: AlphaBetaPlayer(score_fn=center_score),
+    "AB_Improved": lambda: AlphaBetaPlayer(score_fn=improved_score),
+    "AB_Custom": lambda: AlphaBetaPlayer(score_fn=custom_score),
+    "AB_Custom_2": lambda: AlphaBetaPlayer(score_fn=custom_score_2),
+    "AB_Custom_3": lambda: AlphaBetaPlayer(score_fn=custom_score_3),
+    "AB_Custom_TT": lambda: AlphaBetaPlayer(score_fn=custom_score, tt_size=2**16,
+                                            move_ordering=MoveOrdering()),
+}
+
+BOARDS = {"bitboard": BitBoard, "board": Board}
+
+# Columns of the result table
+METRICS = ["nodes", "nodes_per_sec", "time_to_depth_ms", "branching_factor"]
+
+
+def record_corpus(games=8, plies=(4, 10, 16, 22), seed=0, width=7, height=7):
+    """Play games between alpha-beta agents on a virtual clock from random
+    openings and return the positions reached at the given plies.
+
+    Parameters
+    ----------
+    games : int (optional)
+        The number of games to play.
+
+    plies : iterable of int (optional)
+        The number of moves played in the sampled positions; positions of
+        games that are over by then are skipped.
+
+    seed : int (optional)
+        The seed of the random openings.
+
+    Returns
+    -------
+    dict
+        The corpus: the board size and the list of positions, each a dict with
+        the game number, the ply and the list of (row, column) moves.
+    """
+    rng = random.Random(seed)
+    positions = []
+    for num in range(games):
+        players = [AlphaBetaPlayer(score_fn=improved_score,
+                                   time_manager=TimeManager(ms_per_node=.05))
+                   for _ in range(2)]
+        game = BitBoard(players[0], players[1], width, height)
+        moves = []
+        while len(moves) <= max(plies):
+            legal = game.get_legal_moves()
+            if not legal:
+                break
+            if len(moves) < 2:
+                move = rng.choice(legal)
+            else:
+                move = game.active_player.get_move(game, lambda: 150.)
+            if len(moves) in plies:
+                positions.append({"game": num, "ply": len(moves), "moves": [list(m) for m in moves]})
+            game.apply_move(move)
+            moves.append(move)
+    return {"width": width, "height": height, "seed": seed, "positions": positions}
+
+
+def load_positions(corpus, player, board_class=BitBoard):
+    """Replay the positions of a corpus for `player` (the active player of
+    every position) and return the boards.
+    """
+    games = []
+    for position in corpus["positions"]:
+        players = [player, "Opponent"] if position["ply"] % 2 == 0 else ["Opponent", player]
+        game = board_class(players[0], players[1], corpus["width"], corpus["height"])
+        for move in position["moves"]:
+            game.apply_move(tuple(move))
+        games.append(game)
+    return games
+
+
+def search_iterations(player, game, depth):
+    """Run an iterative deepening search of `game` up to `depth` without time
+    limit and return the cumulative (nodes, seconds) after every iteration.
+    """
+    player.time_left = lambda: float("inf")
+    player.timer.start(player.time_left)
+    board = player.search_board(game)
+    if isinstance(player, AlphaBetaPlayer):
+        if player.tt is not None: player.tt.new_search()
+        if player.ordering is not None: player.ordering.new_search()
+        search = player.search_root
+    else:
+        search = player.max_value
+
+    iterations = []
+    start = perf_counter()
+    for d in range(1, depth + 1):
+        search(board, d)
+        iterations.append((player.timer.nodes, perf_counter() - start))
+    return iterations
+
+
+def benchmark(config, corpus, depth=DEPTH, board_class=BitBoard, repeat=1):
+    """Benchmark one configuration on every position of the corpus.
+
+    Every position is searched `repeat` times and the fastest run is kept,
+    which filters out most of the timing noise.
+
+    Returns
+    -------
+    dict
+        The METRICS of the configuration.
+    """
+    nodes = last = previous = 0
+    seconds = 0.
+    for num in range(len(corpus["positions"])):
+        runs = []
+        for _ in range(repeat):
+            # a fresh player per run, so that no table is warm
+            player = CONFIGS[config]()
+            game = load_positions({**corpus, "positions": corpus["positions"][num:num + 1]},
+                                  player, board_class)[0]
+            runs.append(search_iterations(player, game, depth))
+        iterations = min(runs, key=lambda run: run[-1][1])
+        counts = [0] + [count for count, _ in iterations]
+        nodes += counts[-1]
+        seconds += iterations[-1][1]
+        last += counts[-1] - counts[-2]
+        previous += counts[-2] - counts[-3] if depth > 1 else 1
+
+    return {
+        "nodes": nodes,
+        "nodes_per_sec": round(nodes / seconds, 1) if seconds else 0.,
+        "time_to_depth_ms": round(1000. * seconds / len(corpus["positions"]), 3),
+        "branching_factor": round(last / previous, 3) if previous else 0.,
+    }
+
+
+def compare(results, baseline):
+    """Return {config: {metric: relative change}} for the configurations
+    present in both result sets (None when the baseline value is 0).
+    """
+    changes = {}
+    for config, metrics in results.items():
+        if config not in baseline:
+            continue
+        changes[config] = {}
+        for metric in METRICS:
+            old = baseline[config][metric]
+            changes[config][metric] = (metrics[metric] - old) / old if old else None
+    return changes
+
+
+def print_results(results, changes=None):
+    """Print the result table, with the relative changes from the baseline."""
+    print("{:<14}{:>12}{:>14}{:>16}{:>12}".format("Config", "Nodes", "Nodes/s", "Depth time ms",
+                                                  "Branching"))
+    for config, metrics in results.items():
+        print("{:<14}{:>12}{:>14.0f}{:>16.2f}{:>12.2f}".format(
+            config, *(metrics[metric] for metric in METRICS)))
+        if changes and config in changes:
+            print("{:<14}{:>12}{:>14}{:>16}{:>12}".format(
+                "", *(format_change(changes[config][metric]) for metric in METRICS)))
+
+
+def format_change(change):
+    """Format a relative change for the result table."""
+    return "n/a" if change is None else "{:+.1%}".format(change)
+
+
+def write_corpus(corpus, f):
+    """Write a corpus as JSON with one position per line, so that the file
+    stays compact and line diffs follow the positions.
+    """
+    header = dict((key, value) for key, value in corpus.items() if key != "positions")
+    f.write(json.dumps(header)[:-1] + ', "positions": [\n')
+    f.write(",\n".join(json.dumps(position) for position in corpus["positions"]))
+    f.write("\n]}\n")
+
+
+def main(args):
+
+    if args.record:
+        corpus = record_corpus(args.record, seed=args.seed)
+        with open(args.corpus, "w") as f:
+            write_corpus(corpus, f)
+        print("Recorded {} positions to {}".format(len(corpus["positions"]), args.corpus))
+        return
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    configs = args.configs or list(CONFIGS)
+    results = {}
+    for config in configs:
+        results[config] = benchmark(config, corpus, args.depth, BOARDS[args.board], args.repeat)
+
+    changes = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if (baseline["depth"], baseline["board"]) != (args.depth, args.board):
+            print("Warning: the baseline was run with depth {} on {}".format(
+                baseline["depth"], baseline["board"]))
+        changes = compare(results, baseline["results"])
+
+    print("{} positions, depth {}, {}\n".format(len(corpus["positions"]), args.depth, args.board))
+    print_results(results, changes)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"depth": args.depth, "board": args.board, "results": results}, f, indent=1)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the search throughput of the agents.")
+    parser.add_argument("-c", "--configs", nargs="+", choices=list(CONFIGS),
+                        help="configurations to benchmark (all by default)")
+    parser.add_argument("-d", "--depth", type=int, default=DEPTH,
+                        help="depth of the iterative deepening search")
+    parser.add_argument("-b", "--board", choices=list(BOARDS), default="bitboard",
+                        help="board class the positions are searched on")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="search every position this many times and keep the fastest run")
+    parser.add_argument("--corpus", default=CORPUS, help="path of the position corpus")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, default=None,
+                        help="baseline file to compare the results with")
+    parser.add_argument("--save", nargs="?", const=BASELINE, default=None,
+                        help="save the results as a baseline to this file")
+    parser.add_argument("--record", type=int, default=0,
+                        help="record a new corpus from this many games instead of benchmarking")
+    parser.add_argument("-s", "--seed", type=int, default=0,
+                        help="seed of the openings of the recorded games")
+    main(parser.parse_args())
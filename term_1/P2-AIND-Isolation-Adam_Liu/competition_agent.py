@@ -8,8 +8,10 @@
 """
 import random
 
+from mcts import MCTSPlayer
 
-	"""Subclass base exception for code clarity. """
+
+"""Subclass base exception for code clarity. """
 class SearchTimeout(Exception):
 	pass
 
@@ -53,6 +55,9 @@ def custom_score(game, player):
 		COMPETITION.  IT IS NOT REQUIRED FOR THE ISOLATION PROJECT REVIEW.
 	**************************************************************************
 
+	The search is delegated to an `mcts.MCTSPlayer`, which keeps its search
+	tree between the moves of a game.
+
 	Parameters
 	----------
 	data : string
@@ -70,6 +75,7 @@ class CustomPlayer:
 		self.score = custom_score
 		self.time_left = None
 		self.TIMER_THRESHOLD = timeout
+		self.searcher = MCTSPlayer(timeout=timeout)
 
 
 	"""
@@ -100,5 +106,6 @@ class CustomPlayer:
 			(-1, -1) if there are no available legal moves.
 	"""
 	def get_move(self, game, time_left):
-		# OPTIONAL: Finish this function!
-		raise NotImplementedError
+
+		self.time_left = time_left
+		return self.searcher.get_move(game, time_left)
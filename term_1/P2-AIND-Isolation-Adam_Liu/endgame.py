@@ -0,0 +1,201 @@
+"""This file contains `EndgameSolver`, an exact solver for Isolation positions
+in which the two players are partitioned.
+
+Once no open cell is reachable by both players, neither can block the other
+any more and the game reduces to two independent puzzles: each player makes
+as many moves as the longest knight path through their own region allows.
+The active player moves first, so they win if and only if their longest path
+is strictly longer than the opponent's.  Longest paths are found by a
+depth-first search over bitmasks of the remaining cells, memoized on the
+(location, remaining region) pair and bounded by a node budget so that the
+solver gives up (and lets the regular search run) on regions that are still
+too large.  Given the clock of the move, the solver also gives up once it has
+used its share of the time left.  Regions only shrink as the game goes on, so
+after giving up the solver skips every region that is not at least
+`retry_margin` cells smaller than the one it gave up on, until a new game
+starts.
+"""
+from isolation.bitboard import knight_tables, popcount
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def raw_state(game):
+    """Return (blank mask, active player cell index, inactive player cell
+    index) for an `isolation.Board` or `isolation.BitBoard`, with None for a
+    player that has not moved yet.
+    """
+    blanks, p1_loc, p2_loc, turn = game.bit_state()
+    locs = [None if loc < 0 else loc for loc in (p1_loc, p2_loc)]
+    return blanks, locs[turn], locs[turn ^ 1]
+
+
+def reachable(masks, blanks, loc):
+    """Return the mask of the open cells a knight at cell index `loc` can
+    reach in any number of moves through open cells.
+    """
+    seen = frontier = masks[loc] & blanks
+    while frontier:
+        expanded = 0
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            expanded |= masks[low.bit_length() - 1]
+        frontier = expanded & blanks & ~seen
+        seen |= frontier
+    return seen
+
+
+class EndgameSolver():
+    """Exact solver for partitioned Isolation positions.
+
+    Parameters
+    ----------
+    max_nodes : int (optional)
+        The maximum number of path search nodes spent on a position before
+        the solver gives up.
+
+    time_share : float (optional)
+        The fraction of the time left above the threshold that the solver may
+        use before giving up, the rest being left to the regular search.
+
+    check_interval : int (optional)
+        The number of path search nodes between two reads of the clock.
+
+    retry_margin : int (optional)
+        The number of cells a region must have lost since the solver gave up
+        on a region before the solver tries again.
+    """
+
+    def __init__(self, max_nodes=50000, time_share=.5, check_interval=256, retry_margin=2):
+        self.max_nodes = max_nodes
+        self.time_share = time_share
+        self.check_interval = check_interval
+        self.retry_margin = retry_margin
+        self.solved = 0
+        self.aborted = 0
+        self.skipped = 0
+        self._nodes = 0
+        self._cache = {}
+        self._masks = None
+        self._failed_size = None
+        self._move_count = -1
+        self._time_left = None
+        self._reserve = 0.
+
+    def reset(self):
+        """Forget the regions the solver gave up on, for a new game."""
+        self._failed_size = None
+        self._move_count = -1
+
+    def partitioned(self, game):
+        """Return True if no open cell can be reached by both players."""
+        blanks, active_loc, inactive_loc = raw_state(game)
+        if active_loc is None or inactive_loc is None:
+            return False
+        masks, _ = knight_tables(game.width, game.height)
+        return not reachable(masks, blanks, active_loc) & reachable(masks, blanks, inactive_loc)
+
+    def solve(self, game, time_left=None, threshold=0.):
+        """Solve a partitioned position.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position to solve.
+
+        time_left : callable (optional)
+            A function that returns the number of milliseconds left in the
+            current turn.  Without it, only the node budget bounds the solver.
+
+        threshold : float (optional)
+            Time remaining (in milliseconds) when the search of the move must
+            be aborted; the solver stops at `time_share` of the time above it.
+
+        Returns
+        -------
+        (float, (int, int)) or None
+            The utility of the position for the active player (+inf if they
+            win, -inf if they lose) and the move that makes the longest path,
+            or (-1, -1) if they have no legal move.  None if the players are
+            not partitioned, if the search ran out of nodes or time, or if it
+            already did on a region not `retry_margin` cells larger than
+            the region of one of the players.
+        """
+        # a game only moves forward, an earlier position is a new game
+        if game.move_count < self._move_count:
+            self.reset()
+        self._move_count = game.move_count
+
+        blanks, active_loc, inactive_loc = raw_state(game)
+        if active_loc is None or inactive_loc is None:
+            return None
+        masks, coords = knight_tables(game.width, game.height)
+        active_region = reachable(masks, blanks, active_loc)
+        inactive_region = reachable(masks, blanks, inactive_loc)
+        if active_region & inactive_region:
+            return None
+        roots = (inactive_loc, inactive_region), (active_loc, active_region)
+        if (self._failed_size is not None and
+                max(popcount(active_region), popcount(inactive_region))
+                > self._failed_size - self.retry_margin):
+            self.skipped += 1
+            return None
+
+        self._masks = masks
+        self._nodes = 0
+        self._cache = {}
+        self._time_left = time_left
+        if time_left is not None:
+            self._reserve = threshold + (1. - self.time_share) * max(0., time_left() - threshold)
+        lengths = []
+        try:
+            for loc, region in roots:
+                lengths.append(self._longest(loc, region))
+        except _BudgetExceeded:
+            size = popcount(roots[len(lengths)][1])
+            if self._failed_size is None or size < self._failed_size:
+                self._failed_size = size
+            self.aborted += 1
+            return None
+        finally:
+            self._cache = {}
+            self._time_left = None
+        (inactive_length, _), (active_length, move) = lengths
+
+        self.solved += 1
+        value = float("inf") if active_length > inactive_length else float("-inf")
+        return value, (-1, -1) if move is None else coords[move]
+
+    def _longest(self, loc, region):
+        """Return the number of moves of the longest knight path from cell
+        index `loc` through the cells of `region`, and the cell index of its
+        first move (None if there is no move).
+        """
+        key = (loc, region)
+        if key in self._cache:
+            return self._cache[key]
+        self._nodes += 1
+        if self._nodes > self.max_nodes:
+            raise _BudgetExceeded()
+        if (self._time_left is not None and not self._nodes % self.check_interval
+                and self._time_left() < self._reserve):
+            raise _BudgetExceeded()
+
+        bound = popcount(region)
+        best, best_move = 0, None
+        moves = self._masks[loc] & region
+        while moves:
+            low = moves & -moves
+            moves ^= low
+            idx = low.bit_length() - 1
+            length = 1 + self._longest(idx, region ^ low)[0]
+            if length > best:
+                best, best_move = length, idx
+                if best == bound:
+                    break
+
+        self._cache[key] = best, best_move
+        return best, best_move
@@ -1,3 +1,16 @@
+import math
+
+from isolation.symmetry import canonical_hash, check_symmetric, inverse_move, transform_move
+from search_stats import SearchStats
+from time_manager import TimeManager
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Max and min nodes of the same state are scored from the same player's point
+# of view but searched differently, so they are cached under different keys
+MIN_NODE_KEY = (1 << 64) - 1
+
+
+
 class MiniMaxSearchTimeout(Exception):
 	def __init__(self, best_move):
 		self.best_move = best_move
@@ -110,13 +123,81 @@ def custom_score_3(game, player):
 
 
 
+"""
+	Base class for the search agents.
+
+	When `in_place` is True the agents search a single private copy of the
+	board, applying and undoing moves on it (`Board.apply_move()` and
+	`Board.undo_move()`) instead of allocating a new board with
+	`Board.forecast_move()` at every node.
+
+	`time_manager` is an optional `time_manager.TimeManager` deciding when the
+	search must stop; by default the clock is read at every node and the
+	search stops `timeout` milliseconds before the time limit.
+
+	The statistics of every search are collected in `stats`, a
+	`search_stats.SearchStats` instance.
+"""
 class IsolationPlayer:
 	
-	def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.):
+	def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., in_place=False,
+				 time_manager=None):
 		self.score = score_fn
 		self.time_left = None
-		self.TIMER_THRESHOLD = timeout
+		self.timer = time_manager or TimeManager(threshold=timeout)
 		self.search_depth = search_depth
+		self.in_place = in_place
+		self.stats = SearchStats()
+
+
+	"""
+		Time remaining (in milliseconds) when search is aborted, read from and
+		written to the time manager so that the two never disagree.
+	"""
+	@property
+	def TIMER_THRESHOLD(self):
+
+		return self.timer.threshold
+
+
+	@TIMER_THRESHOLD.setter
+	def TIMER_THRESHOLD(self, threshold):
+
+		self.timer.threshold = threshold
+
+
+	"""
+		Raise `SearchTimeout` when the time manager decides that the search
+		must stop. Called at the top of every search function.
+	"""
+	def check_time(self):
+
+		if self.timer.expired(self.time_left): raise SearchTimeout()
+
+
+	"""
+		Return the board the search runs on; a private copy in `in_place` mode so
+		that a search aborted by a timeout never leaves the caller's board with
+		moves applied.
+	"""
+	def search_board(self, game):
+
+		return game.copy() if self.in_place else game
+
+
+	"""
+		Return the value of `search_fn` evaluated on the state reached by playing
+		`move` from `game`, either in place or on a forecast copy of the board.
+	"""
+	def child_value(self, search_fn, game, move, *args):
+
+		if self.in_place:
+			game.apply_move(move)
+			value = search_fn(game, *args)
+			game.undo_move()
+			return value
+
+		return search_fn(game.forecast_move(move), *args)
 
 
 
@@ -152,20 +233,25 @@ class MinimaxPlayer(IsolationPlayer):
 	"""
 	def get_move(self, game, time_left):
 		self.time_left = time_left
+		self.timer.start(time_left)
+		self.stats.start_move(time_left)
 
 		# Initialize the best move so that this function returns something
 		# in case the search fails due to timeout
 		best_move = (-1, -1)
+		depth, timed_out = 0, False
 
 		try:
 			# The try/except block will automatically catch the exception
 			# raised when the timer is about to expire.
-			return self.minimax(game, self.search_depth)
+			best_move = self.minimax(self.search_board(game), self.search_depth)
+			depth = self.search_depth
 
 		except SearchTimeout:
-			pass  # Handle any actions required after timeout as needed
+			timed_out = True  # Handle any actions required after timeout as needed
 
 		# Return the best move from the last completed search iteration
+		self.stats.end_move(time_left, self.timer.nodes, depth, timed_out)
 		return best_move
 
 
@@ -210,7 +296,7 @@ class MinimaxPlayer(IsolationPlayer):
 	"""
 	def minimax(self, game, depth):
 
-		if self.time_left() < self.TIMER_THRESHOLD: raise SearchTimeout()
+		self.check_time()
 		return self.max_value(game, depth)[1]
 
 
@@ -221,7 +307,7 @@ class MinimaxPlayer(IsolationPlayer):
 	"""
 	def max_value(self, game, depth):
 
-		if self.time_left() < self.TIMER_THRESHOLD: raise SearchTimeout()
+		self.check_time()
 		moves = game.get_legal_moves()
 
 		# return the score and the none move if reaches the max depth of no more legal moves
@@ -234,7 +320,7 @@ class MinimaxPlayer(IsolationPlayer):
 		# start searching
 		for move in moves:
 			v = best_v
-			best_v = max(best_v, self.min_value(game.forecast_move(move), depth-1)[0])
+			best_v = max(best_v, self.child_value(self.min_value, game, move, depth-1)[0])
 			if best_v != v:
 				best_move = move
 
@@ -248,7 +334,7 @@ class MinimaxPlayer(IsolationPlayer):
 	"""
 	def min_value(self, game, depth):
 
-		if self.time_left() < self.TIMER_THRESHOLD: raise SearchTimeout()
+		self.check_time()
 		moves = game.get_legal_moves()
 
 		# return the score and the none move if reaches the max depth of no more legal moves
@@ -261,7 +347,7 @@ class MinimaxPlayer(IsolationPlayer):
 		# start searching
 		for move in moves:
 			v = best_v
-			best_v = min(best_v, self.max_value(game.forecast_move(move), depth-1)[0])
+			best_v = min(best_v, self.child_value(self.max_value, game, move, depth-1)[0])
 			if best_v != v:
 				best_move = move
 
@@ -273,9 +359,65 @@ class MinimaxPlayer(IsolationPlayer):
 	Game-playing agent that chooses a move using iterative deepening minimax
 	search with alpha-beta pruning. You must finish and test this player to
 	make sure it returns a good move before the search time limit expires.
+
+	When `tt_size` is positive, search results are cached in a transposition
+	table holding up to `tt_size` entries, which is kept between iterations
+	and between moves so that each deeper iteration reuses the previous ones.
+	With `tt_symmetry`, states are cached under the hash of their canonical
+	orientation (`isolation.symmetry`), so that the rotations and reflections
+	of a state share one entry; this needs an `isolation.BitBoard` game and a
+	heuristic invariant under the symmetries (`ValueError` is raised otherwise).
+
+	`move_ordering` is an optional `move_ordering.MoveOrdering` instance (or
+	any object with the same interface) used to sort the moves of every node
+	before they are searched.
+
+	When `batch_depth` is positive, the nodes that many plies (or fewer) above
+	the search horizon are searched by a `batch_eval.FrontierSearch`, which
+	scores all of their leaves at once with the vectorized version of the
+	heuristic. This mode needs an `isolation.BitBoard` game and a heuristic
+	with a vectorized version, and the time is only checked once per batch.
+
+	Before searching, the player plays the move stored in `book` (an
+	`opening_book.OpeningBook`) for the current position, if any, and then
+	asks `endgame` (an `endgame.EndgameSolver`) to solve the position exactly
+	once the players are partitioned, within a share of the time left.
+
+	With `pvs`, every move after the first one is searched with a null window
+	around the bound set by the moves before it, and only re-searched with
+	the full window when it turns out to be better (principal variation
+	search). With a positive `aspiration`, each iteration of the iterative
+	deepening search starts with the window (v - aspiration, v + aspiration)
+	around the value v found by the previous iteration, and is searched again
+	with the full window if the value falls outside. `researches` counts the
+	searches repeated by both features.
 """
 class AlphaBetaPlayer(IsolationPlayer):
 
+	def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., in_place=False, tt_size=0,
+				 move_ordering=None, time_manager=None, batch_depth=0, book=None, endgame=None,
+				 tt_symmetry=False, pvs=False, aspiration=0.):
+		IsolationPlayer.__init__(self, search_depth, score_fn, timeout, in_place, time_manager)
+		if tt_size and tt_symmetry: check_symmetric(score_fn)
+		self.tt = TranspositionTable(tt_size) if tt_size else None
+		self.tt_symmetry = tt_symmetry
+		self.ordering = move_ordering
+		self.batch_depth = batch_depth
+		self.frontier = None
+		if batch_depth:
+			# numpy is only needed by the batch search
+			from batch_eval import FrontierSearch
+			self.frontier = FrontierSearch(score_fn)
+		self.book = book
+		self.endgame = endgame
+		self.pvs = pvs
+		self.aspiration = aspiration
+		self.researches = 0
+		self.completed_depth = 0
+		self.timed_out = False
+		self.root_depth = 0
+
+
 	"""
 		Search for the best move from the available legal moves and return a
 		result before the time limit expires.
@@ -309,17 +451,53 @@ class AlphaBetaPlayer(IsolationPlayer):
 	def get_move(self, game, time_left):
 
 		self.time_left = time_left
+		self.timer.start(time_left)
+		self.stats.start_move(time_left, self.tt)
+		self.completed_depth = 0
+		self.timed_out = False
+
+		move = self.search_move(game, time_left)
+		self.stats.end_move(time_left, self.timer.nodes, self.completed_depth, self.timed_out, self.tt)
+		return move
+
+
+	"""
+		Return the move of the opening book or of the endgame solver if any,
+		otherwise the best move of the deepest completed iteration of the
+		iterative deepening search.
+	"""
+	def search_move(self, game, time_left):
+
 		moves = game.get_legal_moves()
 		if not moves: return -1, -1
 
-		move = moves[0]
+		if self.book is not None:
+			move = self.book.lookup(game)
+			if move is not None: return move
+		if self.endgame is not None:
+			solution = self.endgame.solve(game, lambda: self.timer.remaining(time_left),
+										  self.TIMER_THRESHOLD)
+			if solution is not None: return solution[1]
+
+		game = self.search_board(game)
+		if self.tt is not None: self.tt.new_search()
+		if self.ordering is not None: self.ordering.new_search()
+
+		move  = moves[0]
+		value = None
 		depth = 1
 
 		try:
 			while True:
-				move = self.alphabeta(game, depth)
+				value, move = self.aspiration_search(game, depth, value)
+				self.completed_depth = depth
+				self.timer.iteration_done(time_left)
+				if not self.timer.next_iteration_fits(time_left): return move
+				# deeper searches cannot see past the end of the game
+				if depth >= len(game.get_blank_spaces()): return move
 				depth += 1
 		except SearchTimeout:
+			self.timed_out = True
 			return move
 
 		return move
@@ -372,8 +550,48 @@ class AlphaBetaPlayer(IsolationPlayer):
 	"""
 	def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
 
-		if self.time_left() < self.TIMER_THRESHOLD: raise SearchTimeout()
-		return self.ab_max_value(game, depth)[1]
+		self.check_time()
+		return self.search_root(game, depth, alpha, beta)[1]
+
+
+	"""
+		Search the root state `depth` plies deep within the (alpha, beta)
+		window, starting a new iteration of the search.
+		Return the value of the root and its best move.
+	"""
+	def search_root(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+
+		self.root_depth = depth
+		if self.ordering is not None: self.ordering.new_iteration()
+		return self.ab_max_value(game, depth, alpha, beta)
+
+
+	"""
+		Search the root state with an aspiration window around `guess`, the
+		value found by the previous iteration (None for the first one), and
+		search it again with the full window if the value falls outside.
+	"""
+	def aspiration_search(self, game, depth, guess):
+
+		if not self.aspiration or guess is None or math.isinf(guess):
+			return self.search_root(game, depth)
+
+		alpha, beta = guess - self.aspiration, guess + self.aspiration
+		value, move = self.search_root(game, depth, alpha, beta)
+		if alpha < value < beta: return value, move
+
+		self.researches += 1
+		return self.search_root(game, depth)
+
+
+	"""
+		Return the number of nodes searched by each completed iteration of the
+		last iterative deepening search, starting with depth 1.
+	"""
+	def nodes_per_depth(self):
+
+		counts = [nodes for nodes, _ in self.timer.iterations]
+		return [b - a for a, b in zip(counts, counts[1:])]
 
 
 	"""
@@ -383,22 +601,48 @@ class AlphaBetaPlayer(IsolationPlayer):
 	"""
 	def ab_max_value(self, game, depth, alpha=float("-inf"), beta=float("inf")):
 
-		if self.time_left() < self.TIMER_THRESHOLD: raise SearchTimeout()
+		self.check_time()
 
 		if depth == 0:
 			 return self.score(game, self), (-1, -1)
 		if game.utility(self) != 0.0:
 			return game.utility(self), (-1, -1)
+		if depth <= self.batch_depth:
+			return self.frontier.search(game, depth, maximizing=True)
+
+		moves   = game.get_legal_moves()
+		key     = game.hash()
+		tt_move = None
+
+		if self.tt is not None:
+			tt_key = self.tt_key(game, key)
+			value, tt_move = self.tt_lookup(tt_key, depth, alpha, beta, moves)
+			if value is not None: return value, tt_move
+		if self.ordering is not None:
+			moves = self.ordering.order(game, moves, self.root_depth - depth, key, tt_move)
 
-		moves     = game.get_legal_moves()
+		window    = alpha, beta
 		best_move = moves[0]
 
-		for move in moves:
+		for idx, move in enumerate(moves):
 
-			v, _ = self.ab_min_value(game.forecast_move(move), depth-1, alpha, beta)
+			if idx and self.pvs and alpha > float("-inf"):
+				v, _ = self.child_value(self.ab_min_value, game, move, depth-1, alpha,
+										math.nextafter(alpha, beta))
+				if alpha < v < beta:
+					self.researches += 1
+					v, _ = self.child_value(self.ab_min_value, game, move, depth-1, alpha, beta)
+			else:
+				v, _ = self.child_value(self.ab_min_value, game, move, depth-1, alpha, beta)
 			if v > alpha: alpha, best_move = v, move
-			if alpha >= beta: break
-
+			if alpha >= beta:
+				self.stats.record_cutoff(idx)
+				if self.ordering is not None:
+					self.ordering.record_cutoff(move, self.root_depth - depth, depth, idx)
+				break
+
+		if self.ordering is not None and alpha > window[0]: self.ordering.record_best(key, best_move)
+		if self.tt is not None: self.tt_store(tt_key, depth, alpha, best_move, *window)
 		return alpha, best_move
 
 
@@ -409,25 +653,104 @@ class AlphaBetaPlayer(IsolationPlayer):
 	"""
 	def ab_min_value(self, game, depth, alpha=float("-inf"), beta=float("inf")):
 
-		if self.time_left() < self.TIMER_THRESHOLD: raise SearchTimeout()
+		self.check_time()
 
 		if depth == 0:
 			 return self.score(game, self), (-1, -1)
 		if game.utility(self) != 0.0:
 			return game.utility(self), (-1, -1)
+		if depth <= self.batch_depth:
+			return self.frontier.search(game, depth, maximizing=False)
+
+		moves   = game.get_legal_moves()
+		key     = game.hash() ^ MIN_NODE_KEY
+		tt_move = None
 
-		moves     = game.get_legal_moves()
+		if self.tt is not None:
+			tt_key = self.tt_key(game, key)
+			value, tt_move = self.tt_lookup(tt_key, depth, alpha, beta, moves)
+			if value is not None: return value, tt_move
+		if self.ordering is not None:
+			moves = self.ordering.order(game, moves, self.root_depth - depth, key, tt_move)
+
+		window    = alpha, beta
 		best_move = moves[0]
 
-		for move in moves:
+		for idx, move in enumerate(moves):
 
-			v, _ = self.ab_max_value(game.forecast_move(move), depth-1, alpha, beta)
+			if idx and self.pvs and beta < float("inf"):
+				v, _ = self.child_value(self.ab_max_value, game, move, depth-1,
+										math.nextafter(beta, alpha), beta)
+				if alpha < v < beta:
+					self.researches += 1
+					v, _ = self.child_value(self.ab_max_value, game, move, depth-1, alpha, beta)
+			else:
+				v, _ = self.child_value(self.ab_max_value, game, move, depth-1, alpha, beta)
 			if v < beta: beta, best_move = v, move
-			if alpha >= beta: break
-
+			if alpha >= beta:
+				self.stats.record_cutoff(idx)
+				if self.ordering is not None:
+					self.ordering.record_cutoff(move, self.root_depth - depth, depth, idx)
+				break
+
+		if self.ordering is not None and beta < window[1]: self.ordering.record_best(key, best_move)
+		if self.tt is not None: self.tt_store(tt_key, depth, beta, best_move, *window)
 		return beta, best_move
 
 
+	"""
+		Return the transposition table key of a state searched under the node
+		`key`: the node key itself, or in `tt_symmetry` mode the hash of the
+		canonical state (carrying over the node type) along with the symmetry
+		mapping the state to its canonical orientation.
+	"""
+	def tt_key(self, game, key):
+
+		if not self.tt_symmetry: return key, None
+		canonical_key, sym = canonical_hash(game)
+		return canonical_key ^ key ^ game.hash(), (sym, game.width, game.height)
+
+
+	"""
+		Look up a state in the transposition table.
+		Return the stored value and move if the entry was searched deep enough
+		to decide the node within the (alpha, beta) window; otherwise return None
+		and move the stored best move (if any) to the front of `moves` so that it
+		is searched first.
+	"""
+	def tt_lookup(self, tt_key, depth, alpha, beta, moves):
+
+		key, sym = tt_key
+		entry = self.tt.probe(key)
+		if entry is None: return None, None
+		move = entry.move if sym is None else inverse_move(entry.move, *sym)
+
+		if entry.depth >= depth:
+			if entry.flag == EXACT: return entry.value, move
+			if entry.flag == LOWER and entry.value >= beta: return entry.value, move
+			if entry.flag == UPPER and entry.value <= alpha: return entry.value, move
+
+		if move in moves:
+			moves.remove(move)
+			moves.insert(0, move)
+		return None, move
+
+
+	"""
+		Store the value returned by searching a state with the original
+		(alpha, beta) window, as an upper bound if it failed low, a lower
+		bound if it failed high, and an exact value otherwise.
+	"""
+	def tt_store(self, tt_key, depth, value, move, alpha, beta):
+
+		key, sym = tt_key
+		if sym is not None: move = transform_move(move, *sym)
+		if value <= alpha: flag = UPPER
+		elif value >= beta: flag = LOWER
+		else: flag = EXACT
+		self.tt.store(key, depth, flag, value, move)
+
+
 
 
 
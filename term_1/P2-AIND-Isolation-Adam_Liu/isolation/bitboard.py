@@ -0,0 +1,342 @@
+"""
+This file contains the `BitBoard` class, an alternative engine for the game
+Isolation that follows exactly the same rules and public interface as
+`isolation.Board`, but keeps the open cells and the player locations in
+integer bitmasks.
+
+Cells are numbered the same way as in `Board` (index = row + column * height)
+and bit `i` of the blank mask is set while cell `i` is still open.  The knight
+moves reachable from every cell are precomputed once per board size, so that
+legal move generation, `forecast_move()` and `utility()` reduce to a handful of
+integer operations instead of list copies and per-call coordinate checks.
+"""
+from .isolation import Board
+from .zobrist import zobrist_keys, move_key
+
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+_TABLES = {}
+
+
+def knight_tables(width, height):
+    """Return the precomputed lookup tables for a board of the given size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (tuple<int>, tuple<(int, int)>)
+        A pair with the bitmask of the knight moves from every cell index, and
+        the (row, column) coordinate pair of every cell index.
+    """
+    key = (width, height)
+    if key not in _TABLES:
+        coords = tuple((idx % height, idx // height)
+                       for idx in range(width * height))
+        masks = []
+        for r, c in coords:
+            mask = 0
+            for dr, dc in DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << (r + dr + (c + dc) * height)
+            masks.append(mask)
+        _TABLES[key] = (tuple(masks), coords)
+    return _TABLES[key]
+
+
+def popcount(mask):
+    """Return the number of bits set in a non-negative integer."""
+    return bin(mask).count("1")
+
+
+class BitBoard(Board):
+    """Implement a model for the game Isolation assuming each player moves like
+    a knight in chess, backed by integer bitmasks.
+
+    `BitBoard` is a drop-in replacement for `isolation.Board`.  Unlike `Board`,
+    the legal moves are returned in a fixed order (increasing cell index)
+    rather than shuffled on every call.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        self._knight_masks, self._coords = knight_tables(width, height)
+
+        # Bit i is set while cell i is open; player locations are stored as
+        # cell indices (or NOT_MOVED), and _turn is 0 when player 1 is active
+        self._blanks = (1 << (width * height)) - 1
+        self._locations = [Board.NOT_MOVED, Board.NOT_MOVED]
+        self._turn = 0
+        self._history = []
+
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._hash = 0
+
+    def hash(self):
+        """Return the Zobrist hash of the current game state."""
+        return self._hash
+
+    def _seat(self, player):
+        """Return 0 for player 1 and 1 for player 2."""
+        if player == self._player_1:
+            return 0
+        elif player == self._player_2:
+            return 1
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def bit_state(self):
+        """Return the raw game state as a tuple (blank mask, player 1 cell
+        index, player 2 cell index, seat of the active player), where a player
+        that has not moved yet is at index -1 and the seat is 0 for player 1
+        and 1 for player 2.
+        """
+        p1_loc, p2_loc = self._locations
+        return (self._blanks,
+                -1 if p1_loc is Board.NOT_MOVED else p1_loc,
+                -1 if p2_loc is Board.NOT_MOVED else p2_loc,
+                self._turn)
+
+    def _moves_mask(self, seat):
+        """Return the bitmask of the open cells the player in the given seat
+        can move to.
+        """
+        loc = self._locations[seat]
+        if loc is Board.NOT_MOVED:
+            return self._blanks
+        return self._knight_masks[loc] & self._blanks
+
+    def _to_moves(self, mask):
+        """Convert a bitmask of cells into a list of (row, column) pairs."""
+        coords = self._coords
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.__dict__.update(self.__dict__)
+        new_board._locations = self._locations[:]
+        new_board._history = []
+        return new_board
+
+    def forecast_move(self, move):
+        """Return a deep copy of the current game with an input move applied to
+        advance the game one ply.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        isolation.BitBoard
+            A deep copy of the board with the input move applied.
+        """
+        new_board = self.copy()
+        new_board.apply_move(move)
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                (self._blanks >> (move[0] + move[1] * self.height)) & 1 == 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._to_moves(self._blanks)
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        loc = self._locations[self._seat(player)]
+        if loc is Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[loc]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        seat = self._turn if player is None else self._seat(player)
+        return self._to_moves(self._moves_mask(seat))
+
+    def mobility(self, loc):
+        """Return the number of open cells a knight could move to from the
+        location `loc`, a coordinate pair (row, column).
+        """
+        return popcount(self._knight_masks[loc[0] + loc[1] * self.height] & self._blanks)
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        last_loc = self._locations[self._turn]
+        self._history.append((idx, last_loc, self._hash))
+        self._hash ^= move_key(self._zobrist_keys, self._turn, idx, last_loc)
+        self._locations[self._turn] = idx
+        self._blanks &= ~(1 << idx)
+        self._turn ^= 1
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def undo_move(self):
+        """Revert the last move applied to this board in place, handing the
+        initiative back to the player who made it.
+
+        Only moves applied to this object can be undone; copies returned by
+        `copy()` and `forecast_move()` start with an empty move history.
+        """
+        if not self._history:
+            raise RuntimeError("There are no moves to undo on this board.")
+        idx, last_loc, self._hash = self._history.pop()
+        self._turn ^= 1
+        self._locations[self._turn] = last_loc
+        self._blanks |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._moves_mask(self._turn)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._moves_mask(self._turn)
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player.
+
+                    /  +infinity,   "player" wins
+        utility =  |   -infinity,   "player" loses
+                    \\          0,    otherwise
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the utility for the active player on the board.
+
+        Returns
+        ----------
+        float
+            The utility value of the current game state for the specified
+            player. The game has a utility of +inf if the player has won,
+            a value of -inf if the player has lost, and a value of 0
+            otherwise.
+        """
+        if not self._moves_mask(self._turn):
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        p1_loc, p2_loc = self._locations
+
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if (self._blanks >> idx) & 1:
+                    out += ' '
+                elif p1_loc == idx:
+                    out += symbols[0]
+                elif p2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
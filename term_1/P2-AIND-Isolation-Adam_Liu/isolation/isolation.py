@@ -11,6 +11,8 @@ import random
 import timeit
 from copy import copy
 
+from .zobrist import zobrist_keys, move_key
+
 TIME_LIMIT_MILLIS = 150
 
 
@@ -52,8 +54,34 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Moves applied to this object, as (cell index, previous location of
+        # the moving player, previous hash) tuples, so that they can be
+        # reverted in place
+        self._history = []
+
+        # Zobrist hash of the current state, updated incrementally
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._hash = 0
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the Zobrist hash of the current game state."""
+        return self._hash
+
+    def bit_state(self):
+        """Return the raw game state in the format of `BitBoard.bit_state()`:
+        (blank mask, player 1 cell index, player 2 cell index, seat of the
+        active player), where a player that has not moved yet is at index -1
+        and the seat is 0 for player 1 and 1 for player 2.
+        """
+        blanks = 0
+        for idx in range(self.width * self.height):
+            if self._board_state[idx] == Board.BLANK:
+                blanks |= 1 << idx
+        p1_loc, p2_loc = self._board_state[-1], self._board_state[-2]
+        return (blanks,
+                -1 if p1_loc is Board.NOT_MOVED else p1_loc,
+                -1 if p2_loc is Board.NOT_MOVED else p2_loc,
+                self._board_state[-3])
 
     @property
     def active_player(self):
@@ -97,6 +125,7 @@ class Board(object):
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
         new_board._board_state = copy(self._board_state)
+        new_board._hash = self._hash
         return new_board
 
     def forecast_move(self, move):
@@ -190,6 +219,15 @@ class Board(object):
             player = self.active_player
         return self.__get_moves(self.get_player_location(player))
 
+    def mobility(self, loc):
+        """Return the number of open cells a knight could move to from the
+        location `loc`, a coordinate pair (row, column).
+        """
+        r, c = loc
+        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+        return sum(1 for dr, dc in directions if self.move_is_legal((r + dr, c + dc)))
+
     def apply_move(self, move):
         """Move the active player to a specified location.
 
@@ -201,12 +239,32 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        last_loc = self._board_state[-last_move_idx]
+        self._history.append((idx, last_loc, self._hash))
+        self._hash ^= move_key(self._zobrist_keys, last_move_idx - 1, idx, last_loc)
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def undo_move(self):
+        """Revert the last move applied to this board in place, handing the
+        initiative back to the player who made it.
+
+        Only moves applied to this object can be undone; copies returned by
+        `copy()` and `forecast_move()` start with an empty move history.
+        """
+        if not self._history:
+            raise RuntimeError("There are no moves to undo on this board.")
+        idx, last_loc, self._hash = self._history.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self._board_state[-3] ^= 1
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._board_state[-last_move_idx] = last_loc
+        self._board_state[idx] = Board.BLANK
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
         return player == self._inactive_player and not self.get_legal_moves(self._active_player)
@@ -0,0 +1,173 @@
+"""
+Symmetries of the Isolation board.
+
+Reflecting or rotating the board does not change the game: a square board
+has 8 symmetries (the dihedral group of the square) and a rectangular one
+has 4.  This module maps raw board states (see `BitBoard.bit_state()`, also
+provided by `Board`) to a canonical orientation, so that the 4 to 8
+equivalent states share a single entry in a transposition table or an
+opening book.  This is only
+sound for heuristics that score every orientation of a state the same (see
+`check_symmetric()`): heuristics that only count moves are, but the
+`center_score` of `sample_players`, for example, measures the distance to the
+point (width / 2, height / 2), which is not preserved by reflections.
+
+A state is packed into one integer (the blank mask in the low bits, then
+the cell index + 1 of each player and the seat of the active player), and the
+canonical orientation is the one with the smallest packed state.  The cell
+index permutation of every symmetry is precomputed, along with a lookup table
+per symmetry and per byte of the blank mask, so transforming a mask costs one
+table lookup per byte.  Since the player cells occupy the high bits of the
+packed state, only the symmetries that minimize the player cells need their
+blank mask transformed.
+"""
+
+_TRANSFORMS = [
+    lambda r, c, h, w: (r, c),
+    lambda r, c, h, w: (h - 1 - r, w - 1 - c),
+    lambda r, c, h, w: (r, w - 1 - c),
+    lambda r, c, h, w: (h - 1 - r, c),
+    # the transforms below swap rows and columns: square boards only
+    lambda r, c, h, w: (c, r),
+    lambda r, c, h, w: (c, h - 1 - r),
+    lambda r, c, h, w: (w - 1 - c, r),
+    lambda r, c, h, w: (w - 1 - c, h - 1 - r),
+]
+
+_MASK64 = (1 << 64) - 1
+
+# Heuristics known to score all the orientations of a state the same, as
+# (module, name) pairs: they only count moves
+_SYMMETRIC = {
+    ("sample_players", "null_score"),
+    ("sample_players", "open_move_score"),
+    ("sample_players", "improved_score"),
+    ("game_agent", "custom_score"),
+    ("game_agent", "custom_score_2"),
+    ("game_agent", "custom_score_3"),
+}
+
+_TABLES = {}
+
+
+def permutations(width, height):
+    """Return the cell index permutation of every symmetry of a board of the
+    given size; the first one is the identity.
+    """
+    return _tables(width, height)[0]
+
+
+def _tables(width, height):
+    """Return the permutations, their inverses and the byte lookup tables of
+    the symmetries of a board of the given size.
+    """
+    key = (width, height)
+    if key not in _TABLES:
+        cells = width * height
+        transforms = _TRANSFORMS if width == height else _TRANSFORMS[:4]
+        perms = [tuple(r + c * height for r, c in
+                       (fn(idx % height, idx // height, height, width) for idx in range(cells)))
+                 for fn in transforms]
+        inverses = [tuple(perm.index(idx) for idx in range(cells)) for perm in perms]
+
+        byte_tables = []
+        for perm in perms:
+            chunks = []
+            for base in range(0, cells, 8):
+                table = [0] * 256
+                for value in range(256):
+                    for bit in range(8):
+                        if value >> bit & 1 and base + bit < cells:
+                            table[value] |= 1 << perm[base + bit]
+                chunks.append(table)
+            byte_tables.append(chunks)
+        _TABLES[key] = perms, inverses, byte_tables
+    return _TABLES[key]
+
+
+def check_symmetric(score_fn):
+    """Check that the heuristic `score_fn` can share its values between the
+    orientations of a state.
+
+    Raises
+    ------
+    ValueError
+        If `score_fn` is not known to be invariant under the symmetries.
+    """
+    key = (getattr(score_fn, "__module__", None), getattr(score_fn, "__name__", None))
+    if key not in _SYMMETRIC:
+        raise ValueError("The heuristic {}.{} is not known to be symmetric".format(*key))
+
+
+def pack(blanks, p1_loc, p2_loc, turn, cells):
+    """Pack a raw board state (player cells -1 before their first move) into
+    a single integer.
+    """
+    return blanks | (p1_loc + 1) << cells | (p2_loc + 1) << (cells + 7) | turn << (cells + 14)
+
+
+def transform_mask(mask, sym, width, height):
+    """Return the image of a mask of cells by the symmetry `sym`."""
+    byte_tables = _tables(width, height)[2][sym]
+    result = 0
+    for table in byte_tables:
+        result |= table[mask & 255]
+        mask >>= 8
+    return result
+
+
+def transform_move(move, sym, width, height):
+    """Return the image of a (row, column) move by the symmetry `sym`."""
+    idx = _tables(width, height)[0][sym][move[0] + move[1] * height]
+    return idx % height, idx // height
+
+
+def inverse_move(move, sym, width, height):
+    """Return the (row, column) move whose image by the symmetry `sym` is
+    `move`.
+    """
+    idx = _tables(width, height)[1][sym][move[0] + move[1] * height]
+    return idx % height, idx // height
+
+
+def canonical(game):
+    """Return the packed state of the canonical orientation of an
+    `isolation.Board` or `isolation.BitBoard`, and the index of the symmetry
+    mapping the board to it.
+    """
+    blanks, p1_loc, p2_loc, turn = game.bit_state()
+    width, height = game.width, game.height
+    perms, _, byte_tables = _tables(width, height)
+
+    # the player cells are the most significant part of the packed state
+    best_locs, candidates = None, []
+    for sym, perm in enumerate(perms):
+        locs = (perm[p2_loc] if p2_loc >= 0 else -1, perm[p1_loc] if p1_loc >= 0 else -1)
+        if best_locs is None or locs < best_locs:
+            best_locs, candidates = locs, [sym]
+        elif locs == best_locs:
+            candidates.append(sym)
+
+    best = None
+    for sym in candidates:
+        mask, bits = 0, blanks
+        for table in byte_tables[sym]:
+            mask |= table[bits & 255]
+            bits >>= 8
+        if best is None or mask < best[0]:
+            best = mask, sym
+    return pack(best[0], best_locs[1], best_locs[0], turn, width * height), best[1]
+
+
+def canonical_hash(game):
+    """Return a well mixed 64-bit hash of the canonical state of an
+    `isolation.Board` or `isolation.BitBoard` (unique for boards of up to 49
+    cells), and the index of the symmetry mapping the board to its canonical
+    orientation.
+    """
+    key, sym = canonical(game)
+    # splitmix64 finalizer: a bijection that spreads the structured packed
+    # state over all the bits, so that it can index a hash table
+    key = (key ^ (key >> 30)) * 0xbf58476d1ce4e5b9 & _MASK64
+    key = (key ^ (key >> 27)) * 0x94d049bb133111eb & _MASK64
+    return key ^ (key >> 31), sym
@@ -0,0 +1,58 @@
+"""
+Zobrist keys for Isolation boards.
+
+A game state is identified by the set of blocked cells, the location of each
+player and the player holding the initiative.  Every one of those features is
+assigned a random 64-bit key, and the hash of a state is the XOR of the keys of
+its features, so that the boards can update it incrementally in
+`apply_move()` and restore it in `undo_move()`.
+
+The keys are drawn from a fixed seed so that they are identical in every
+process, which keeps hashes comparable across worker processes and runs.
+"""
+import random
+
+SEED = 0x15014710
+
+_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """Return the Zobrist keys for a board of the given size.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (tuple<int>, (tuple<int>, tuple<int>), int)
+        The key of every blocked cell index, the key of every cell index
+        occupied by player 1 and by player 2, and the key XORed in while
+        player 2 holds the initiative.
+    """
+    size = (width, height)
+    if size not in _KEYS:
+        rng = random.Random(SEED ^ (width << 16) ^ height)
+        cells = width * height
+        blocked = tuple(rng.getrandbits(64) for _ in range(cells))
+        positions = (tuple(rng.getrandbits(64) for _ in range(cells)),
+                     tuple(rng.getrandbits(64) for _ in range(cells)))
+        _KEYS[size] = (blocked, positions, rng.getrandbits(64))
+    return _KEYS[size]
+
+
+def move_key(keys, seat, idx, last_idx):
+    """Return the value to XOR into a board hash when the player in `seat`
+    (0 for player 1, 1 for player 2) moves from `last_idx` (None if the player
+    has not moved yet) to the open cell `idx`, passing the initiative.
+    """
+    blocked, positions, side = keys
+    key = blocked[idx] ^ positions[seat][idx] ^ side
+    if last_idx is not None:
+        key ^= positions[seat][last_idx]
+    return key
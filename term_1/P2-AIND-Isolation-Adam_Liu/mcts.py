@@ -0,0 +1,316 @@
+"""This file contains `MCTSPlayer`, an Isolation agent using Monte Carlo tree
+search with the UCT selection rule.
+
+The search runs on raw bitmask states (the blank cells and the cell index of
+each player, see `endgame.raw_state()`), so it works with both
+`isolation.Board` and `isolation.BitBoard` games and an iteration only costs
+integer operations.  Rollouts use a fast epsilon-greedy policy: most moves go
+to the destination with the most onward moves, the others are picked at
+random.
+
+Between consecutive moves, the player keeps the subtree of the position
+reached after its move and its opponent's reply, so the statistics gathered
+for that position are not thrown away.
+
+With `processes` > 0, the search is root-parallel: every worker process grows
+its own tree from the current position for the same time budget, and the
+root visit counts of all the trees (including the player's own) are summed to
+pick the move.  Results that do not arrive before the deadline are dropped.
+"""
+import gc
+import math
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from endgame import raw_state
+from isolation.bitboard import knight_tables
+
+
+class Node():
+    """A node of the search tree, reached by the player `mover` moving to
+    cell `move`; `untried` is the mask of the moves not yet expanded.
+
+    Nodes do not point to their parent: the tree has no reference cycles, so
+    discarded subtrees are freed immediately, without the garbage collector.
+    """
+    __slots__ = ("move", "mover", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, mover, untried):
+        self.move = move
+        self.mover = mover
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+
+class UCTSearch():
+    """Monte Carlo tree search over raw states, where seat 0 is the player
+    to move at the root.
+
+    Parameters
+    ----------
+    width, height : int
+        The size of the board.
+
+    c : float (optional)
+        The exploration constant of the UCT rule.
+
+    greedy : float (optional)
+        The probability that a rollout move goes to the destination with the
+        most onward moves rather than to a random one.
+
+    seed : int (optional)
+        The seed of the random number generator.
+    """
+
+    def __init__(self, width, height, c=1.4, greedy=.75, seed=None):
+        self.masks, self.coords = knight_tables(width, height)
+        self.c = c
+        self.greedy = greedy
+        self.rng = random.Random(seed)
+        self.iterations = 0
+
+    def moves_mask(self, blanks, loc):
+        """Return the mask of the moves from cell `loc` (-1 if the player has
+        not moved yet).
+        """
+        return blanks if loc < 0 else self.masks[loc] & blanks
+
+    def new_root(self, blanks, locs):
+        """Return a new tree for the state where the player at `locs[0]`
+        moves next.
+        """
+        return Node(None, 1, self.moves_mask(blanks, locs[0]))
+
+    def run(self, root, blanks, locs, stop):
+        """Grow the tree of the state (blanks, locs) until `stop()` is True."""
+        while not stop():
+            self.iterate(root, blanks, list(locs))
+
+    def iterate(self, root, blanks, locs):
+        """Run one selection, expansion, rollout and backup step."""
+        node, turn = root, 0
+        path = [root]
+        log, sqrt = math.log, math.sqrt
+        while not node.untried and node.children:
+            scale = self.c * sqrt(log(node.visits))
+            node = max(node.children,
+                       key=lambda child: child.wins / child.visits + scale / sqrt(child.visits))
+            path.append(node)
+            blanks ^= 1 << node.move
+            locs[turn] = node.move
+            turn ^= 1
+
+        if node.untried:
+            low = self._pick(node.untried)
+            node.untried ^= low
+            idx = low.bit_length() - 1
+            blanks ^= low
+            locs[turn] = idx
+            turn ^= 1
+            node = Node(idx, turn ^ 1, self.moves_mask(blanks, locs[turn]))
+            path[-1].children.append(node)
+            path.append(node)
+
+        winner = self.rollout(blanks, locs, turn)
+        for node in path:
+            node.visits += 1
+            if node.mover == winner:
+                node.wins += 1
+        self.iterations += 1
+
+    def rollout(self, blanks, locs, turn):
+        """Play the game out with the rollout policy; return the seat of the
+        winner.
+        """
+        masks, rng = self.masks, self.rng
+        while True:
+            loc = locs[turn]
+            mask = blanks if loc < 0 else masks[loc] & blanks
+            if not mask:
+                return turn ^ 1
+            if rng.random() < self.greedy:
+                best, low = -1, 0
+                bits = mask
+                while bits:
+                    bit = bits & -bits
+                    bits ^= bit
+                    mobility = bin(masks[bit.bit_length() - 1] & blanks).count("1")
+                    if mobility > best:
+                        best, low = mobility, bit
+            else:
+                low = self._pick(mask)
+            blanks ^= low
+            locs[turn] = low.bit_length() - 1
+            turn ^= 1
+
+    def _pick(self, mask):
+        """Return one of the bits of `mask`, chosen at random."""
+        bits = []
+        while mask:
+            low = mask & -mask
+            bits.append(low)
+            mask ^= low
+        return bits[self.rng.randrange(len(bits))]
+
+
+def root_statistics(root):
+    """Return the {cell index: (visits, wins)} statistics of the children of
+    a root node.
+    """
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+def search_worker(job):
+    """Grow a new tree in a worker process until the `time.perf_counter()`
+    deadline and return its root statistics.
+    """
+    blanks, locs, width, height, deadline, c, greedy, seed = job
+    search = UCTSearch(width, height, c, greedy, seed)
+    root = search.new_root(blanks, locs)
+    search.run(root, blanks, locs, lambda: time.perf_counter() >= deadline)
+    return root_statistics(root)
+
+
+class MCTSPlayer():
+    """Game-playing agent that chooses a move with Monte Carlo tree search.
+
+    Parameters
+    ----------
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is aborted.
+
+    c : float (optional)
+        The exploration constant of the UCT rule.
+
+    greedy : float (optional)
+        The probability of a greedy (rather than random) rollout move.
+
+    processes : int (optional)
+        The number of worker processes growing extra trees (0 to search in
+        the calling process only).
+
+    reuse : bool (optional)
+        Keep the relevant subtree between consecutive moves.
+
+    seed : int (optional)
+        The seed of the random number generators.
+    """
+
+    def __init__(self, timeout=10., c=1.4, greedy=.75, processes=0, reuse=True, seed=None):
+        self.time_left = None
+        self.TIMER_THRESHOLD = timeout
+        self.c = c
+        self.greedy = greedy
+        self.processes = processes
+        self.reuse = reuse
+        self.seed = seed
+        self.search = None
+        self._pool = None
+        self._tree = None
+        self._next = None
+
+    def __getstate__(self):
+        # worker pools and search trees stay in the process that made them
+        state = self.__dict__.copy()
+        state.update(search=None, _pool=None, _tree=None, _next=None)
+        return state
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        # the tree holds no reference cycles, so a collection could only
+        # cause a long pause while traversing it
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._search_move(game, time_left)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _search_move(self, game, time_left):
+        """Search the game and return the most visited move."""
+        moves = game.get_legal_moves()
+        if len(moves) < 2:
+            self._tree = self._next = None
+            return moves[0] if moves else (-1, -1)
+
+        blanks, active_loc, inactive_loc = raw_state(game)
+        locs = (-1 if active_loc is None else active_loc,
+                -1 if inactive_loc is None else inactive_loc)
+        if self.search is None or self.search.coords is not knight_tables(game.width, game.height)[1]:
+            self.search = UCTSearch(game.width, game.height, self.c, self.greedy, self.seed)
+        # the previous tree is kept until now so that it is not freed after
+        # the clock checks of the previous move
+        root = self._tree = self._reused_root(blanks, locs)
+
+        futures = []
+        if self.processes:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.processes)
+            # workers stop early enough for their results to come back in time
+            deadline = time.perf_counter() + (time_left() - 2 * self.TIMER_THRESHOLD) / 1000.
+            futures = [self._pool.submit(search_worker, (blanks, locs, game.width, game.height, deadline,
+                                                         self.c, self.greedy, self.search.rng.random()))
+                       for _ in range(self.processes)]
+
+        self.search.run(root, blanks, locs, lambda: time_left() < self.TIMER_THRESHOLD)
+
+        stats = {move: visits for move, (visits, _) in root_statistics(root).items()}
+        if futures:
+            done, _ = wait(futures, timeout=max(0., time_left() - self.TIMER_THRESHOLD) / 1000.)
+            for future in done:
+                for move, (visits, _) in future.result().items():
+                    stats[move] = stats.get(move, 0) + visits
+            for future in futures:
+                future.cancel()
+
+        if not stats:
+            self._next = None
+            return moves[0]
+        best = max(stats, key=stats.get)
+        self._next = None
+        for child in root.children:
+            if child.move == best:
+                self._next = child, blanks ^ (1 << best)
+        return self.search.coords[best]
+
+    def _reused_root(self, blanks, locs):
+        """Return the subtree kept from the previous move if it matches the
+        state, or a new root.
+        """
+        if self.reuse and self._next is not None:
+            node, expected = self._next
+            for child in node.children:
+                if child.move == locs[1] and expected ^ (1 << child.move) == blanks:
+                    return child
+        return self.search.new_root(blanks, locs)
@@ -0,0 +1,159 @@
+"""This file contains the move ordering pipeline used by `AlphaBetaPlayer` to
+search the most promising moves first, which lets alpha-beta pruning cut off
+more of the game tree.
+
+Moves are ranked by, in order of priority:
+
+    1. the principal variation move: the best move found for the same state
+       by the previous iterative deepening iteration (or the transposition
+       table entry, when the player has one),
+    2. killer moves: moves that recently caused a beta cutoff at the same ply,
+    3. the history heuristic: moves that caused cutoffs anywhere in the tree,
+       weighted by the depth of the subtree they pruned,
+    4. mobility: the number of open cells reachable from the destination.
+
+Every stage can be switched off, and the class counts the nodes it ordered
+and the index of the move that caused each cutoff, so that the effect of the
+ordering on the effective branching factor can be measured.
+"""
+
+
+class MoveOrdering():
+    """Stateful move ordering for one search agent.
+
+    Parameters
+    ----------
+    pv : bool (optional)
+        Search the best move of the previous iteration first.
+
+    killers : int (optional)
+        The number of killer moves remembered per ply (0 disables them).
+
+    history : bool (optional)
+        Rank the remaining moves by the history heuristic.
+
+    mobility : bool (optional)
+        Break ties by the mobility of the destination cell.
+    """
+
+    def __init__(self, pv=True, killers=2, history=True, mobility=True):
+        self.use_pv = pv
+        self.num_killers = killers
+        self.use_history = history
+        self.use_mobility = mobility
+
+        self.killers = {}
+        self.history = {}
+        self.pv_moves = {}
+        self.best_moves = {}
+
+        self.nodes = 0
+        self.cutoffs = 0
+        self.cutoffs_by_index = []
+        self.iteration_nodes = []
+
+    def new_search(self):
+        """Reset the per-move state before the search for a new move starts.
+
+        Killer moves are specific to the previous root, so they are dropped,
+        while the history scores are halved so that they slowly age out.
+        """
+        self.killers = {}
+        self.history = {key: value // 2 for key, value in self.history.items() if value > 1}
+        self.pv_moves = {}
+        self.best_moves = {}
+        self.iteration_nodes = []
+
+    def new_iteration(self):
+        """Start a new iterative deepening iteration, making the best moves
+        of the previous one the principal variation moves of this one.
+        """
+        if self.best_moves:
+            self.pv_moves, self.best_moves = self.best_moves, {}
+        self.iteration_nodes.append(self.nodes)
+
+    def order(self, game, moves, ply, key, hint=None):
+        """Return the moves sorted from the most to the least promising.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The state the moves are played from.
+
+        moves : list<(int, int)>
+            The legal moves of the active player.
+
+        ply : int
+            The distance of the state from the root of the search.
+
+        key : int
+            The hash identifying the state (and node type) in the search.
+
+        hint : (int, int) (optional)
+            A move to search first, e.g., from a transposition table.
+        """
+        self.nodes += 1
+        if len(moves) < 2:
+            return moves
+
+        pv_move = hint
+        if pv_move is None and self.use_pv:
+            pv_move = self.pv_moves.get(key)
+        killers = self.killers.get(ply, ()) if self.num_killers else ()
+        history = self.history if self.use_history else {}
+        side = ply & 1
+
+        def rank(move):
+            return (move == pv_move,
+                    move in killers and self.num_killers - killers.index(move),
+                    history.get((side, move), 0),
+                    self.use_mobility and game.mobility(move))
+
+        return sorted(moves, key=rank, reverse=True)
+
+    def record_best(self, key, move):
+        """Remember the best move found for the state with the given key, to
+        be searched first in the next iteration.
+        """
+        if self.use_pv:
+            self.best_moves[key] = move
+
+    def record_cutoff(self, move, ply, depth, index):
+        """Update the killer and history tables after `move`, the move at
+        position `index` in the ordered list, caused a cutoff `depth` plies
+        above the search horizon.
+        """
+        self.cutoffs += 1
+        while len(self.cutoffs_by_index) <= index:
+            self.cutoffs_by_index.append(0)
+        self.cutoffs_by_index[index] += 1
+
+        if self.num_killers:
+            killers = self.killers.setdefault(ply, [])
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[self.num_killers:]
+
+        if self.use_history:
+            key = (ply & 1, move)
+            self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def first_move_cutoff_rate(self):
+        """Return the fraction of cutoffs caused by the first ordered move."""
+        if not self.cutoffs:
+            return 0.
+        return self.cutoffs_by_index[0] / self.cutoffs
+
+    def cutoffs_per_node(self):
+        """Return the number of cutoffs per ordered node."""
+        if not self.nodes:
+            return 0.
+        return self.cutoffs / self.nodes
+
+    def effective_branching_factors(self):
+        """Return the ratio between the nodes searched by each completed
+        iteration of the current search and by the iteration before it.
+        """
+        counts = self.iteration_nodes
+        nodes = [b - a for a, b in zip(counts, counts[1:])]
+        return [b / a for a, b in zip(nodes, nodes[1:]) if a]
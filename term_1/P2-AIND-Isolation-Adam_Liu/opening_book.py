@@ -0,0 +1,202 @@
+"""This file contains `OpeningBook`, a table of precomputed search results for
+the early positions of Isolation, and the builder that fills it.
+
+The builder runs a deep fixed-depth alpha-beta search on every position
+reachable in the first `max_ply` plies.  Rotating or reflecting a square
+board does not change the game, so positions are stored once per symmetry
+class, under the key of their canonical orientation (see
+`isolation.symmetry`), along with the best move in that orientation.
+
+The book is saved as a compact binary file: a fixed header followed by the
+sorted 64-bit keys, the move cell indices (one byte each) and the values
+(64-bit floats).  Lookups use a binary search on the sorted keys.
+
+Build a book from the command line with, e.g.:
+
+    python opening_book.py --plies 2 --depth 7 --output opening_book.bin
+"""
+import argparse
+import struct
+import sys
+
+from array import array
+from bisect import bisect_left
+
+from isolation import BitBoard
+from isolation.symmetry import canonical, check_symmetric, inverse_move, permutations
+from game_agent import AlphaBetaPlayer, custom_score
+
+MAGIC = b"ISOB"
+VERSION = 2
+HEADER = struct.Struct("<4sHBBBI")  # magic, version, width, height, depth, entries
+
+class OpeningBook():
+    """Precomputed best moves and values of early positions.
+
+    Parameters
+    ----------
+    width, height : int (optional)
+        The size of the board.
+
+    depth : int (optional)
+        The search depth the entries were computed with.
+    """
+
+    def __init__(self, width=7, height=7, depth=0):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.hits = 0
+        self._keys = array("Q")
+        self._moves = array("B")
+        self._values = array("d")
+        self._pending = {}
+
+    def add(self, key, move, value):
+        """Add the canonical move (a cell index) and value of the position with
+        the given canonical key.
+        """
+        self._pending[key] = move, value
+
+    def _merge(self):
+        """Merge the entries added since the last lookup into the sorted
+        arrays.
+        """
+        if not self._pending:
+            return
+        entries = dict(zip(self._keys, zip(self._moves, self._values)))
+        entries.update(self._pending)
+        self._pending = {}
+        keys = sorted(entries)
+        self._keys = array("Q", keys)
+        self._moves = array("B", (entries[key][0] for key in keys))
+        self._values = array("d", (entries[key][1] for key in keys))
+
+    def probe(self, game):
+        """Return the best move and value stored for the position of the
+        `isolation.Board` or `isolation.BitBoard`, or None if it is not in the book.
+        """
+        if (game.width, game.height) != (self.width, self.height):
+            return None
+        self._merge()
+        key, sym = canonical(game)
+        idx = bisect_left(self._keys, key)
+        if idx == len(self._keys) or self._keys[idx] != key:
+            return None
+        self.hits += 1
+        move = self._moves[idx]
+        move = inverse_move((move % self.height, move // self.height), sym, self.width, self.height)
+        return move, self._values[idx]
+
+    def lookup(self, game):
+        """Return the best move stored for the position, or None."""
+        entry = self.probe(game)
+        return None if entry is None else entry[0]
+
+    def save(self, path):
+        """Write the book to a binary file."""
+        self._merge()
+        keys, values = array("Q", self._keys), array("d", self._values)
+        if sys.byteorder == "big":
+            keys.byteswap()
+            values.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.depth, len(keys)))
+            f.write(keys.tobytes())
+            f.write(self._moves.tobytes())
+            f.write(values.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a book written by `save()`."""
+        with open(path, "rb") as f:
+            magic, version, width, height, depth, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("{} is not an opening book file".format(path))
+            book = cls(width, height, depth)
+            book._keys.frombytes(f.read(8 * count))
+            book._moves.frombytes(f.read(count))
+            book._values.frombytes(f.read(8 * count))
+        if sys.byteorder == "big":
+            book._keys.byteswap()
+            book._values.byteswap()
+        return book
+
+    def __len__(self):
+        self._merge()
+        return len(self._keys)
+
+
+def build_book(max_ply=2, depth=6, score_fn=None, width=7, height=7, verbose=False):
+    """Search every position of the first plies of the game and store the
+    results in a new `OpeningBook`.
+
+    Parameters
+    ----------
+    max_ply : int (optional)
+        The positions with up to this many moves played are searched.
+
+    depth : int (optional)
+        The depth of the alpha-beta search of each position.
+
+    score_fn : callable (optional)
+        The heuristic of the search (`game_agent.custom_score` by default),
+        which must be invariant under the symmetries of the board.
+
+    width, height : int (optional)
+        The size of the board.
+
+    verbose : bool (optional)
+        Print the progress of the build.
+    """
+    score_fn = score_fn or custom_score
+    check_symmetric(score_fn)
+    players = [AlphaBetaPlayer(search_depth=depth, score_fn=score_fn, tt_size=2**16)
+               for _ in range(2)]
+    for player in players:
+        player.time_left = lambda: float("inf")
+        player.timer.start(player.time_left)
+
+    book = OpeningBook(width, height, depth)
+    perms = permutations(width, height)
+    game = BitBoard(players[0], players[1], width, height)
+    frontier = {canonical(game)[0]: game}
+
+    for ply in range(max_ply + 1):
+        children = {}
+        for num, game in enumerate(frontier.values()):
+            key, sym = canonical(game)
+            player = game.active_player
+            player.tt.new_search()
+            for d in range(1, depth + 1):
+                value, move = player.ab_max_value(game, d)
+            if move != (-1, -1):
+                book.add(key, perms[sym][move[0] + move[1] * height], value)
+
+            if ply < max_ply:
+                for move in game.get_legal_moves():
+                    child = game.forecast_move(move)
+                    children.setdefault(canonical(child)[0], child)
+            if verbose:
+                print("ply {}: {}/{} positions".format(ply, num + 1, len(frontier)), end="\r")
+        if verbose:
+            print()
+        frontier = children
+
+    return book
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Build an Isolation opening book.")
+    parser.add_argument("-p", "--plies", type=int, default=2,
+                        help="search the positions with up to this many moves played")
+    parser.add_argument("-d", "--depth", type=int, default=6,
+                        help="depth of the alpha-beta search of every position")
+    parser.add_argument("-o", "--output", default="opening_book.bin",
+                        help="path of the book file")
+    args = parser.parse_args()
+
+    opening_book = build_book(args.plies, args.depth, verbose=True)
+    opening_book.save(args.output)
+    print("Saved {} positions to {}".format(len(opening_book), args.output))
@@ -0,0 +1,174 @@
+"""This file contains `SearchStats`, the statistics the search agents of
+`game_agent.py` collect during `get_move()`, and the functions `tournament.py`
+uses to dump them.
+
+Every agent owns a `SearchStats` instance (its `stats` attribute) that sums,
+over the moves it searched: the number of nodes and the time spent, the depth
+of the last completed search iteration, the transposition table probes and
+hits, the beta cutoffs by index of the move in the ordered move list, the
+searches aborted by the timer (every iterative deepening search ends that
+way unless it runs out of depth), and the time left on the clock when the
+move was returned (the timeout margin).
+"""
+import csv
+import json
+
+# Scalar fields of the summary returned by `SearchStats.summary()`, in the
+# order of the CSV columns
+SUMMARY_FIELDS = ["moves", "nodes", "search_ms", "nodes_per_sec", "mean_depth", "max_depth",
+                  "tt_probes", "tt_hits", "tt_hit_rate", "cutoffs", "first_move_cutoff_rate",
+                  "aborted", "mean_margin_ms", "min_margin_ms"]
+
+
+class SearchStats():
+    """Statistics of the searches run by one agent."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget every recorded search."""
+        self.moves = 0
+        self.nodes = 0
+        self.search_ms = 0.
+        self.depths = []
+        self.margins = []
+        self.aborted = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.cutoffs_by_index = []
+        self._move_start = None
+
+    def start_move(self, time_left, tt=None):
+        """Start recording the search of a move.
+
+        Parameters
+        ----------
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn.
+
+        tt : `transposition.TranspositionTable` (optional)
+            The transposition table of the agent, if any.
+        """
+        self._move_start = (time_left(),
+                            tt.probes if tt is not None else 0,
+                            tt.hits if tt is not None else 0)
+
+    def end_move(self, time_left, nodes, depth, timed_out=False, tt=None):
+        """Record the end of the search of a move.
+
+        Parameters
+        ----------
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn.
+
+        nodes : int
+            The number of nodes searched.
+
+        depth : int
+            The depth of the last completed search (0 if none completed).
+
+        timed_out : bool (optional)
+            True if the search was aborted by the timer.
+
+        tt : `transposition.TranspositionTable` (optional)
+            The transposition table of the agent, if any.
+        """
+        start, probes, hits = self._move_start
+        margin = time_left()
+        self.moves += 1
+        self.nodes += nodes
+        self.search_ms += start - margin
+        self.depths.append(depth)
+        self.margins.append(margin)
+        self.aborted += bool(timed_out)
+        if tt is not None:
+            self.tt_probes += tt.probes - probes
+            self.tt_hits += tt.hits - hits
+
+    def record_cutoff(self, index):
+        """Record a beta cutoff caused by the move at position `index` of the
+        ordered move list.
+        """
+        while len(self.cutoffs_by_index) <= index:
+            self.cutoffs_by_index.append(0)
+        self.cutoffs_by_index[index] += 1
+
+    def merge(self, other):
+        """Add the searches recorded by another `SearchStats` to this one."""
+        self.moves += other.moves
+        self.nodes += other.nodes
+        self.search_ms += other.search_ms
+        self.depths += other.depths
+        self.margins += other.margins
+        self.aborted += other.aborted
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        for index, count in enumerate(other.cutoffs_by_index):
+            while len(self.cutoffs_by_index) <= index:
+                self.cutoffs_by_index.append(0)
+            self.cutoffs_by_index[index] += count
+        return self
+
+    def nodes_per_second(self):
+        """Return the number of nodes searched per second."""
+        return 1000. * self.nodes / self.search_ms if self.search_ms > 0 else 0.
+
+    def summary(self):
+        """Return a dict of the summary statistics listed in SUMMARY_FIELDS,
+        plus the list of cutoffs by move index.
+        """
+        cutoffs = sum(self.cutoffs_by_index)
+        return {
+            "moves": self.moves,
+            "nodes": self.nodes,
+            "search_ms": round(self.search_ms, 3),
+            "nodes_per_sec": round(self.nodes_per_second(), 1),
+            "mean_depth": sum(self.depths) / len(self.depths) if self.depths else 0.,
+            "max_depth": max(self.depths, default=0),
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_hit_rate": self.tt_hits / self.tt_probes if self.tt_probes else 0.,
+            "cutoffs": cutoffs,
+            "first_move_cutoff_rate": self.cutoffs_by_index[0] / cutoffs if cutoffs else 0.,
+            "aborted": self.aborted,
+            "mean_margin_ms": sum(self.margins) / len(self.margins) if self.margins else 0.,
+            "min_margin_ms": min(self.margins, default=0.),
+            "cutoffs_by_index": list(self.cutoffs_by_index),
+        }
+
+    def to_dict(self):
+        """Return the raw statistics as a dict of JSON serializable values."""
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+    @classmethod
+    def from_dict(cls, values):
+        """Rebuild the statistics returned by `to_dict()`."""
+        stats = cls()
+        stats.__dict__.update(values)
+        return stats
+
+
+def dump_json(records, path, totals=None):
+    """Write the per match records (dicts holding a "stats" summary) and the
+    optional per agent totals to a JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump({"matches": records, "totals": totals or {}}, f, indent=1)
+
+
+def dump_csv(records, path):
+    """Write the per match records to a CSV file, one row per record with the
+    stats summary flattened into columns.
+    """
+    keys = [key for key in records[0] if key != "stats"] if records else []
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(keys + SUMMARY_FIELDS + ["cutoffs_by_index"])
+        for record in records:
+            summary = record["stats"]
+            writer.writerow([record[key] for key in keys] +
+                            [summary[field] for field in SUMMARY_FIELDS] +
+                            [" ".join(map(str, summary["cutoffs_by_index"]))])
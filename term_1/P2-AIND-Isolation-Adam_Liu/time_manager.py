@@ -0,0 +1,104 @@
+"""This file contains the `TimeManager` class, which decides when the search
+agents in `game_agent.py` must stop searching.
+
+Reading the clock at every node is both slow and noisy, so the manager only
+reads it once every `check_interval` nodes (the timeout threshold must then
+cover the time needed to search that many nodes).  After each completed
+iterative deepening iteration, it can also predict the duration of the next
+one from the measured branching factor, and stop the search early when the
+next iteration would not finish in time anyway.
+
+With `ms_per_node` set, the manager runs on a virtual clock instead: the
+search is charged a fixed number of milliseconds per node, starting from the
+time left when the search started.  Searches then stop after exactly the same
+number of nodes on every run and every machine, which makes benchmarks
+reproducible (but the real time limit is ignored, so this mode should not be
+used in timed games).
+"""
+
+
+class TimeManager():
+    """Per-move time management for a search agent.
+
+    Parameters
+    ----------
+    threshold : float (optional)
+        Time remaining (in milliseconds) when search is aborted.
+
+    check_interval : int (optional)
+        The number of nodes searched between two reads of the clock.
+
+    predict : bool (optional)
+        Do not start an iterative deepening iteration that is predicted to
+        run out of time.
+
+    ms_per_node : float (optional)
+        If set, use a virtual clock charging this many milliseconds per node.
+    """
+
+    def __init__(self, threshold=10., check_interval=1, predict=False, ms_per_node=None):
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.predict = predict
+        self.ms_per_node = ms_per_node
+
+        self.budget = None
+        self.nodes = 0
+        self.iterations = [(0, 0.)]
+        self._countdown = check_interval
+
+    def start(self, time_left):
+        """Start timing the search of a new move.
+
+        Parameters
+        ----------
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn.
+        """
+        self.budget = time_left()
+        self.nodes = 0
+        self.iterations = [(0, 0.)]
+        self._countdown = self.check_interval
+
+    def remaining(self, time_left):
+        """Return the number of milliseconds left for the search, on the
+        virtual clock if the manager uses one.
+        """
+        if self.ms_per_node is not None and self.budget is not None:
+            return self.budget - self.nodes * self.ms_per_node
+        return time_left()
+
+    def expired(self, time_left):
+        """Count a searched node and return True if the search must stop.
+
+        The clock is only read once every `check_interval` calls.
+        """
+        self.nodes += 1
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+        self._countdown = self.check_interval
+        return self.remaining(time_left) < self.threshold
+
+    def iteration_done(self, time_left):
+        """Record the number of nodes and the time used so far, at the end of
+        a completed iterative deepening iteration.
+        """
+        budget = self.budget if self.budget is not None else 0.
+        self.iterations.append((self.nodes, budget - self.remaining(time_left)))
+
+    def next_iteration_fits(self, time_left):
+        """Return False if the next iterative deepening iteration is predicted
+        to run out of time.
+
+        The duration of the next iteration is the duration of the last one
+        multiplied by the branching factor measured between the last two
+        iterations (the ratio of their node counts).
+        """
+        if not self.predict or len(self.iterations) < 3:
+            return True
+        (n0, _), (n1, t1), (n2, t2) = self.iterations[-3:]
+        branching = (n2 - n1) / max(1, n1 - n0)
+        predicted = (t2 - t1) * max(1., branching)
+        return predicted < self.remaining(time_left) - self.threshold
@@ -8,18 +8,42 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+The matches can be spread over a pool of worker processes with the
+`--processes` option.  Every match is played from its own seed, so a given
+`--seed` reproduces the same openings whatever the number of processes.
+
+With `--adaptive`, matches are scheduled one round (a match against every
+opponent) at a time, and the tournament stops as soon as every `AB_Custom`
+agent is confidently stronger or weaker than `AB_Improved`, reporting the
+Elo rating of each agent with its confidence interval.
+
+With `--stats PATH`, the search statistics of every agent in every match
+(nodes per second, depth reached, transposition table hits, cutoffs by move
+index and timeout margins, see `search_stats.py`) are written to PATH, as CSV
+if it ends with ".csv" and as JSON (with the totals per agent) otherwise.
+
+With `--opponents NAME...`, only the named cpu agents are played against;
+`tournament_1.py` ... `tournament_7.py` are shortcuts for a single opponent.
 """
+import argparse
 import itertools
+import os
 import random
 import warnings
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from time import time
 
-from isolation import Board
+from isolation import BitBoard
 from sample_players import (RandomPlayer, open_move_score,
 							improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
 						custom_score_2, custom_score_3)
+from search_stats import SearchStats, dump_csv, dump_json
+from tournament_stats import compare, elo_interval
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -35,46 +59,151 @@ game_agent.py.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
-	"""Compare the test agents to the cpu agent in "fair" matches.
-	"Fair" matches use random starting locations and force the agents to
-	play as both first and second player to control for advantages resulting
-	from choosing better opening moves or having first initiative to move.
+def play_match(cpu_agent, test_agents, win_counts, seed=None):
+	"""Play a single "fair" match of every test agent against the cpu agent,
+	starting all games from the same random opening. If `seed` is given, the
+	random number generator is reseeded first so that the match (including
+	the moves of randomized agents) can be reproduced in any process.
 	"""
+	if seed is not None:
+		random.seed(seed)
+
 	timeout_count = 0
 	forfeit_count = 0
-	for _ in range(num_matches):
 
-		games = sum([[Board(cpu_agent.player, agent.player),
-					  Board(agent.player, cpu_agent.player)]
-					for agent in test_agents], [])
+	games = sum([[BitBoard(cpu_agent.player, agent.player),
+				  BitBoard(agent.player, cpu_agent.player)]
+				for agent in test_agents], [])
 
-		# initialize all games with a random move and response
-		for _ in range(2):
-			move = random.choice(games[0].get_legal_moves())
-			for game in games:
-				game.apply_move(move)
-
-		# play all games and tally the results
+	# initialize all games with a random move and response
+	for _ in range(2):
+		move = random.choice(games[0].get_legal_moves())
 		for game in games:
-			winner, _, termination = game.play(time_limit=TIME_LIMIT)
-			win_counts[winner] += 1
+			game.apply_move(move)
+
+	# play all games and tally the results
+	for game in games:
+		winner, _, termination = game.play(time_limit=TIME_LIMIT)
+		win_counts[winner] += 1
 
-			if termination == "timeout":
-				timeout_count += 1
-			elif termination == "forfeit":
-				forfeit_count += 1
+		if termination == "timeout":
+			timeout_count += 1
+		elif termination == "forfeit":
+			forfeit_count += 1
 
 	return timeout_count, forfeit_count
 
 
+# Agents of the tournament in a worker process, set once by init_worker() so
+# that they are not pickled again for every match
+_worker_agents = None
+
+
+def init_worker(cpu_agents, test_agents):
+	global _worker_agents
+	_worker_agents = (cpu_agents, test_agents)
+
+
+def run_match(job):
+	"""Play the match described by `job`, a (cpu agent index, seed) pair, with
+	the agents of the current process, and return the number of games won by
+	each test agent along with the timeout and forfeit counts, and the search
+	statistics of the cpu agent and of each test agent in this match (None for
+	agents that do not collect any).
+	"""
+	cpu_idx, seed = job
+	cpu_agents, test_agents = _worker_agents
+	cpu_agent = cpu_agents[cpu_idx]
+	agents = [cpu_agent] + list(test_agents)
+	for agent in agents:
+		if hasattr(agent.player, "stats"): agent.player.stats.reset()
+
+	wins = {agent.player: 0 for agent in test_agents}
+	wins[cpu_agent.player] = 0
+	counts = play_match(cpu_agent, test_agents, wins, seed)
+	stats = [agent.player.stats.to_dict() if hasattr(agent.player, "stats") else None
+			 for agent in agents]
+	return [wins[agent.player] for agent in test_agents], counts[0], counts[1], stats
+
+
+@contextmanager
+def match_runner(cpu_agents, test_agents, processes=1):
+	"""Provide a function that plays a list of match jobs and returns an
+	iterator over their results, in order. With more than one process, the
+	matches are shared among a pool of worker processes.
+	"""
+	if processes <= 1:
+		init_worker(cpu_agents, test_agents)
+		yield lambda jobs: map(run_match, jobs)
+		return
+
+	with ProcessPoolExecutor(processes, initializer=init_worker,
+							 initargs=(cpu_agents, test_agents)) as executor:
+		yield lambda jobs: executor.map(run_match, jobs)
+
+
+def match_results(cpu_agents, test_agents, num_matches, processes=1, seed=None):
+	"""Generate the results of every match of the tournament, in order: the
+	`num_matches` matches against the first cpu agent, then the second, etc.
+	Each result is a (cpu agent index, wins per test agent, timeouts, forfeits,
+	search statistics) tuple.
+	"""
+	if seed is None:
+		seed = random.randrange(2**32)
+	jobs = [(cpu_idx, seed + cpu_idx * num_matches + match_idx)
+			for cpu_idx in range(len(cpu_agents)) for match_idx in range(num_matches)]
+
+	with match_runner(cpu_agents, test_agents, processes) as run:
+		for job, result in zip(jobs, run(jobs)):
+			yield (job[0],) + result
+
+
+def stats_records(match_idx, cpu_agent, test_agents, match_stats):
+	"""Return the search statistics records of the agents of one match."""
+	records = []
+	for role, agent, stats in zip(["cpu"] + ["test"] * len(test_agents),
+								  [cpu_agent] + list(test_agents), match_stats):
+		if stats is not None:
+			records.append({"match": match_idx, "opponent": cpu_agent.name, "agent": agent.name,
+							"role": role, "stats": SearchStats.from_dict(stats)})
+	return records
+
+
+def write_stats(path, records):
+	"""Print the search statistics of the test agents over the whole
+	tournament, and write the statistics of every agent in every match to
+	`path` (CSV or JSON).
+	"""
+	totals = {}
+	for record in records:
+		key = "{} ({})".format(record["agent"], record["role"])
+		totals.setdefault(key, SearchStats()).merge(record["stats"])
+
+	print("\n{:^13}{:^12}{:^12}{:^10}{:^12}{:^14}".format(
+		"Agent", "Moves", "Nodes/s", "Depth", "Aborted", "Min margin"))
+	print("-" * 74)
+	for key, stats in totals.items():
+		if key.endswith("(test)"):
+			summary = stats.summary()
+			print("{:^13}{:^12}{:^12.0f}{:^10.2f}{:^12}{:^14.1f}".format(
+				key[:-len(" (test)")], summary["moves"], summary["nodes_per_sec"],
+				summary["mean_depth"], summary["aborted"], summary["min_margin_ms"]))
+
+	records = [dict(record, stats=record["stats"].summary()) for record in records]
+	if path.endswith(".csv"):
+		dump_csv(records, path)
+	else:
+		dump_json(records, path, {key: stats.summary() for key, stats in totals.items()})
+	print("\nSearch statistics written to {}".format(path))
+
+
 def update(total_wins, wins):
 	for player in total_wins:
 		total_wins[player] += wins[player]
 	return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
+def play_matches(cpu_agents, test_agents, num_matches, processes=1, seed=None, stats_path=None):
 	"""Play matches between the test agent and each cpu_agent individually. """
 	total_wins = {agent.player: 0 for agent in test_agents}
 	total_timeouts = 0.
@@ -84,15 +213,22 @@ def play_matches(cpu_agents, test_agents, num_matches):
 	print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
 	print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
 
+	results = match_results(cpu_agents, test_agents, num_matches, processes, seed)
+	records = []
+
 	for idx, agent in enumerate(cpu_agents):
 		wins = {key: 0 for (key, value) in test_agents}
 		wins[agent.player] = 0
 
 		print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-		counts = play_round(agent, test_agents, wins, num_matches)
-		total_timeouts += counts[0]
-		total_forfeits += counts[1]
+		matches = itertools.islice(results, num_matches)
+		for match_idx, (_, match_wins, timeouts, forfeits, stats) in enumerate(matches, idx * num_matches):
+			records += stats_records(match_idx, agent, test_agents, stats)
+			for test_agent, won in zip(test_agents, match_wins):
+				wins[test_agent.player] += won
+			total_timeouts += timeouts
+			total_forfeits += forfeits
 		total_wins = update(total_wins, wins)
 		_total = 2 * num_matches
 		round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
@@ -119,9 +255,77 @@ def play_matches(cpu_agents, test_agents, num_matches):
 	if total_forfeits:
 		print(("\nYour agents forfeited {} games while there were still " +
 			   "legal moves available to play.\n").format(total_forfeits))
+	if stats_path:
+		write_stats(stats_path, records)
+
+
+def play_adaptive(cpu_agents, test_agents, max_matches, processes=1, seed=None,
+				  z=1.96, min_matches=5, stats_path=None):
+	"""Play rounds of fair matches (one against every cpu agent) until each
+	test agent compares significantly better or worse than the first test
+	agent (the reference) at `z` standard errors, or until `max_matches`
+	matches against each cpu agent have been played, then print the Elo
+	rating of every test agent against the pool of cpu agents.
+	"""
+	if seed is None:
+		seed = random.randrange(2**32)
+	reference = test_agents[0]
+	rounds_per_batch = max(1, processes // len(cpu_agents))
+	min_samples = min_matches * len(cpu_agents)
+
+	# score (fraction of the two games won) of every test agent in each match
+	scores = [[] for _ in test_agents]
+	total_timeouts = 0
+	total_forfeits = 0
+	rounds = 0
+	records = []
+
+	with match_runner(cpu_agents, test_agents, processes) as run:
+		while rounds < max_matches:
+			num_rounds = min(rounds_per_batch, max_matches - rounds)
+			jobs = [(cpu_idx, seed + (rounds + r) * len(cpu_agents) + cpu_idx)
+					for r in range(num_rounds) for cpu_idx in range(len(cpu_agents))]
+			for (cpu_idx, _), (match_wins, timeouts, forfeits, stats) in zip(jobs, run(jobs)):
+				records += stats_records(len(scores[0]), cpu_agents[cpu_idx], test_agents, stats)
+				for agent_scores, won in zip(scores, match_wins):
+					agent_scores.append(won / 2.)
+				total_timeouts += timeouts
+				total_forfeits += forfeits
+			rounds += num_rounds
+
+			verdicts = [compare(agent_scores, scores[0], z, min_samples)[2]
+						for agent_scores in scores[1:]]
+			print("{:>4} matches/opponent: {} undecided".format(rounds, verdicts.count(0)), flush=True)
+			if 0 not in verdicts:
+				break
+
+	print("\n{:^13}{:^9}{:^10}{:^22}{:^20}".format(
+		"Agent", "Games", "Win Rate", "Elo (interval)", "vs " + reference.name))
+	print("-" * 74)
+	for agent, agent_scores in zip(test_agents, scores):
+		games = 2 * len(agent_scores)
+		wins = 2 * sum(agent_scores)
+		rating, low, high = elo_interval(wins, games, z)
+		if agent is reference:
+			verdict = "reference"
+		else:
+			diff, margin, better = compare(agent_scores, scores[0], z, min_samples)
+			verdict = "{:+.2f}+/-{:.2f} {}".format(
+				diff, margin, {1: "better", -1: "worse", 0: "?"}[better])
+		print("{:^13}{:^9}{:^10}{:^22}{:^20}".format(
+			agent.name, games, "{:.1f}%".format(100 * wins / games),
+			"{:+.0f} ({:+.0f}, {:+.0f})".format(rating, low, high), verdict))
+
+	if total_timeouts:
+		print("\nThere were {} timeouts during the tournament.".format(total_timeouts))
+	if total_forfeits:
+		print("\nYour agents forfeited {} games while there were still ".format(total_forfeits) +
+			  "legal moves available to play.")
+	if stats_path:
+		write_stats(stats_path, records)
 
 
-def main():
+def main(args):
 
 	# Define two agents to compare -- these agents will play from the same
 	# starting position against the same adversaries in the tournament
@@ -142,24 +346,61 @@ def main():
 		Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
 		Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
 	]
+	if args.opponents:
+		names = [agent.name for agent in cpu_agents]
+		for name in args.opponents:
+			if name not in names:
+				raise ValueError("Unknown opponent {!r}, expected one of {}".format(name, names))
+		cpu_agents = [agent for agent in cpu_agents if agent.name in args.opponents]
 
 	print(DESCRIPTION)
 	print("{:^74}".format("*************************"))
 	print("{:^74}".format("Playing Matches"))
 	print("{:^74}".format("*************************"))
-	play_matches(cpu_agents, test_agents, NUM_MATCHES)
+	if args.adaptive:
+		play_adaptive(cpu_agents, test_agents, args.matches, args.processes, args.seed,
+					  args.z, args.min_matches, args.stats)
+	else:
+		play_matches(cpu_agents, test_agents, args.matches, args.processes, args.seed, args.stats)
 
 
 def calcuTime(start):
 	period = time() - start
 	print("Used: %sm %s" % (period//60, period%60))
 
-if __name__ == "__main__":
 
-	from time import time
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description=DESCRIPTION)
+	parser.add_argument("-n", "--matches", type=int, default=NUM_MATCHES,
+						help="number of fair matches against each opponent")
+	parser.add_argument("-p", "--processes", type=int, default=1,
+						help="number of worker processes (0 for one per CPU core)")
+	parser.add_argument("-s", "--seed", type=int, default=None,
+						help="seed of the first match, to reproduce a tournament")
+	parser.add_argument("-o", "--opponents", nargs="+", default=None,
+						help="only play against these cpu agents (all of them by default)")
+	parser.add_argument("-a", "--adaptive", action="store_true",
+						help="stop as soon as the ranking against AB_Improved is settled; "
+							 "--matches is then the maximum number of matches per opponent")
+	parser.add_argument("--min-matches", type=int, default=5,
+						help="minimum number of matches per opponent in adaptive mode")
+	parser.add_argument("-z", type=float, default=1.96,
+						help="width of the confidence intervals, in standard errors")
+	parser.add_argument("--stats", default=None,
+						help="write the search statistics of every match to this file "
+							 "(CSV if it ends with .csv, JSON otherwise)")
+	args = parser.parse_args(argv)
+	if args.processes == 0:
+		args.processes = os.cpu_count()
+	return args
+
+
+def run(argv=None):
+	"""Parse the command line options and play the tournament, timing it"""
 	start = time()
-	main()
+	main(parse_args(argv))
 	calcuTime(start)
-	# print("time spent: %s" % str(time()-start))
 
 
+if __name__ == "__main__":
+	run()
@@ -0,0 +1,95 @@
+"""Statistics used by the adaptive mode of `tournament.py` to rate the test
+agents and to decide when enough matches have been played.
+
+Win rates are estimated with Wilson score intervals and converted to Elo
+ratings relative to the pool of cpu agents (an agent that wins half of its
+games is rated 0).  Two test agents are compared on the difference of their
+scores in the same matches: every test agent plays the same openings against
+the same opponent, so the paired differences have a much lower variance than
+the two win rates taken separately.
+"""
+import math
+
+# Elo ratings are clipped at this value for agents that win (or lose) every game
+MAX_ELO = 800.
+
+
+def elo(score):
+    """Return the Elo rating difference implied by an expected score (the
+    fraction of games won) against the opponents.
+    """
+    if score <= 0.:
+        return -MAX_ELO
+    if score >= 1.:
+        return MAX_ELO
+    return max(-MAX_ELO, min(MAX_ELO, 400. * math.log10(score / (1. - score))))
+
+
+def wilson_interval(wins, games, z=1.96):
+    """Return the (low, high) Wilson score interval of the win rate of an
+    agent that won `wins` out of `games` games, at `z` standard deviations.
+    """
+    if not games:
+        return 0., 1.
+    p = wins / games
+    denominator = 1. + z * z / games
+    center = (p + z * z / (2. * games)) / denominator
+    spread = z * math.sqrt(p * (1. - p) / games + z * z / (4. * games * games)) / denominator
+    return max(0., center - spread), min(1., center + spread)
+
+
+def elo_interval(wins, games, z=1.96):
+    """Return the Elo rating of an agent that won `wins` out of `games` games
+    along with the (low, high) bounds of its confidence interval.
+    """
+    low, high = wilson_interval(wins, games, z)
+    return elo(wins / games if games else .5), elo(low), elo(high)
+
+
+def mean_interval(samples, z=1.96):
+    """Return the mean of the samples and the half width of its confidence
+    interval at `z` standard errors (infinite for fewer than two samples).
+    """
+    n = len(samples)
+    if not n:
+        return 0., float("inf")
+    mean = sum(samples) / n
+    if n < 2:
+        return mean, float("inf")
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    return mean, z * math.sqrt(variance / n)
+
+
+def compare(scores, reference_scores, z=1.96, min_samples=2):
+    """Compare an agent to a reference agent from their paired scores.
+
+    Parameters
+    ----------
+    scores : list<float>
+        The score (fraction of games won) of the agent in each match.
+
+    reference_scores : list<float>
+        The score of the reference agent in the same matches.
+
+    z : float (optional)
+        The number of standard errors of the confidence interval.
+
+    min_samples : int (optional)
+        The number of matches required before a verdict can be reached.
+
+    Returns
+    -------
+    (float, float, int)
+        The mean score difference, the half width of its confidence interval,
+        and the verdict: 1 if the agent is significantly stronger than the
+        reference, -1 if it is significantly weaker, 0 if undecided.
+    """
+    diffs = [a - b for a, b in zip(scores, reference_scores)]
+    mean, margin = mean_interval(diffs, z)
+    if len(diffs) < min_samples:
+        return mean, margin, 0
+    if mean - margin > 0:
+        return mean, margin, 1
+    if mean + margin < 0:
+        return mean, margin, -1
+    return mean, margin, 0
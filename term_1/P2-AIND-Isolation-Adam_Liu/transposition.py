@@ -0,0 +1,85 @@
+"""This file contains a bounded transposition table used by the search agents
+in `game_agent.py` to reuse the results of positions that were already
+searched, either in a previous iterative deepening iteration or through a
+different (transposed) order of moves.
+
+Entries are indexed by the Zobrist hash of the game state returned by
+`Board.hash()`.  Each slot holds a single entry, and a new entry replaces the
+stored one when the slot is empty, was written by an older search, or was
+searched to a depth no greater than the new one (depth-preferred replacement
+with aging).
+"""
+from collections import namedtuple
+
+EXACT = 0  # the stored value is the minimax value of the position
+LOWER = 1  # the search failed high: the true value is >= the stored value
+UPPER = 2  # the search failed low: the true value is <= the stored value
+
+Entry = namedtuple("Entry", ["key", "depth", "flag", "value", "move", "generation"])
+
+
+class TranspositionTable():
+    """Fixed size hash table of search results.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The maximum number of entries held by the table.
+    """
+
+    def __init__(self, size=2**18):
+        self.size = size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self._slots = [None] * size
+
+    def clear(self):
+        """Remove every entry from the table."""
+        self._slots = [None] * self.size
+
+    def new_search(self):
+        """Start a new search generation; entries written by older searches
+        are replaced first.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """Return the `Entry` stored for the state with the given hash, or None
+        if the state is not in the table.
+        """
+        self.probes += 1
+        entry = self._slots[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, flag, value, move):
+        """Record the result of searching the state with the given hash.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the searched state.
+
+        depth : int
+            The number of plies searched below the state.
+
+        flag : int
+            One of EXACT, LOWER or UPPER, describing how `value` bounds the
+            minimax value of the state.
+
+        value : float
+            The value returned by the search.
+
+        move : (int, int)
+            The best move found for the state.
+        """
+        idx = key % self.size
+        old = self._slots[idx]
+        if old is None or old.generation != self.generation or depth >= old.depth:
+            self._slots[idx] = Entry(key, depth, flag, value, move, self.generation)
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
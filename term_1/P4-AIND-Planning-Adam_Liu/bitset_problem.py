@@ -0,0 +1,122 @@
+from functools import cached_property, lru_cache
+from aimacode.search import (Node, Problem)
+from my_planning_graph import GroundedPlanningGraph
+from relaxed_heuristics import (RelaxedHeuristics, RelaxedHeuristicsMixin)
+from lp_utils import (FluentIndex, action_index)
+
+
+
+"""
+	Planning-state engine over integer masks for a planning problem with a
+	`state_map`, an `actions_list` and a list of goal fluents (such as
+	AirCargoProblem or HaveCakeProblem).
+
+	States are int masks of the positive fluents, and every action is compiled
+	into the masks of its positive and negative preconditions, its add list and
+	its delete list, so that testing whether an action applies, computing the
+	successor state and testing the goal are single bitwise operations instead
+	of decoding the state into a PropKB. The actions are returned in the order of
+	`actions_list`, so searches expand the same nodes as on the wrapped problem.
+	Only the actions triggered by a true fluent (see `lp_utils.action_index`)
+	have their preconditions tested.
+
+	:param problem: the planning problem, with states as T/F strings
+"""
+class BitsetProblem(RelaxedHeuristicsMixin, Problem):
+
+	def __init__(self, problem: Problem):
+		self.problem      = problem
+		self.state_map    = problem.state_map
+		self.actions_list = problem.actions_list
+		self.index        = FluentIndex(self.state_map)
+		self.masks        = {}
+		self.action_masks = []
+		for action in self.actions_list:
+			masks = (self.index.mask(action.precond_pos), self.index.mask(action.precond_neg),
+					 self.index.mask(action.effect_add),  self.index.mask(action.effect_rem))
+			self.masks[action] = masks
+			self.action_masks.append((action,) + masks)
+		trigger_index, unconditional = action_index(self.actions_list)
+		self.unconditional = [(idx,) + self.action_masks[idx] for idx in unconditional]
+		self.triggers = dict((self.index.bits[fluent], [(idx,) + self.action_masks[idx] for idx in indices])
+							 for fluent, indices in trigger_index.items())
+		self.goal_mask = self.index.mask(problem.goal)
+		Problem.__init__(self, self.index.from_string(problem.initial), goal=problem.goal)
+
+
+	"""
+		The planning graph and the delete relaxation of the wrapped problem if it
+		has them (built on first use), otherwise of their own.
+	"""
+	@cached_property
+	def planning_graph(self):
+
+		return getattr(self.problem, 'planning_graph', None) or GroundedPlanningGraph(self.problem)
+
+
+	@cached_property
+	def relaxed(self):
+
+		return getattr(self.problem, 'relaxed', None) or RelaxedHeuristics(self.problem)
+
+
+	"""
+		Return the actions that can be executed in the given state.
+
+		:param state: int mask of the positive fluents
+		:return: list of Action objects
+	"""
+	def actions(self, state: int) -> list:
+
+		candidates = list(self.unconditional)
+		bits = state
+		while bits:
+			bit = bits & -bits
+			bits ^= bit
+			candidates.extend(self.triggers.get(bit, ()))
+		candidates.sort(key=lambda candidate: candidate[0])
+
+		return [action for _, action, pos, neg, _, _ in candidates
+				if state & pos == pos and not state & neg]
+
+
+	"""
+		Return the state that results from executing the given
+		action in the given state.
+
+		:param state: int mask of the positive fluents
+		:param action: Action applied
+		:return: resulting state after action
+	"""
+	def result(self, state: int, action) -> int:
+
+		_, _, add, rem = self.masks[action]
+		return state & ~rem | add
+
+
+	def goal_test(self, state: int) -> bool:
+
+		return state & self.goal_mask == self.goal_mask
+
+
+	def h_1(self, node: Node):
+		# note that this is not a true heuristic
+		return 1
+
+
+	"""
+		Level sum heuristic of the planning graph built from the state.
+	"""
+	@lru_cache(maxsize=8192)
+	def h_pg_levelsum(self, node: Node):
+
+		return self.planning_graph.h_levelsum(node.state)
+
+
+	"""
+		Number of goal fluents not in the state.
+	"""
+	@lru_cache(maxsize=8192)
+	def h_ignore_preconditions(self, node: Node):
+
+		return bin(self.goal_mask & ~node.state).count('1')
@@ -73,3 +73,86 @@ def decode_state(state: str, fluent_map: list) -> FluentState:
 		else:
 			fs.neg.append(fluent_map[idx])
 	return fs
+
+
+"""
+	index actions by a trigger fluent: the first of their positive preconditions
+
+	An action can only apply in a state where its trigger fluent is true, so the
+	candidate actions of a state are the ones indexed under its true fluents, and
+	only those need their preconditions checked.
+
+	:param actions: list of Action objects
+	:return: (dict of fluent -> list of the indices of the actions it triggers,
+		list of the indices of the actions without positive preconditions)
+"""
+def action_index(actions: list):
+
+	index, unconditional = {}, []
+	for idx, action in enumerate(actions):
+		if action.precond_pos:
+			index.setdefault(action.precond_pos[0], []).append(idx)
+		else:
+			unconditional.append(idx)
+
+	return index, unconditional
+
+
+"""
+	Map the fluents of a planning problem (its `state_map`) to bit positions.
+	The first fluent of the map is the most significant bit, so that the masks
+	read as the T/F state strings in binary and compare in the same order
+	(searches break ties between nodes by comparing their states).
+
+	:param state_map: ordered list of possible fluents for the problem
+"""
+class FluentIndex():
+
+	def __init__(self, state_map: list):
+		self.state_map = state_map
+		self.bits      = dict((fluent, 1 << (len(state_map) - 1 - i)) for i, fluent in enumerate(state_map))
+
+
+	"""
+		:param fluents: iterable of fluents (expr)
+		:return: int mask of the fluents
+	"""
+	def mask(self, fluents) -> int:
+
+		mask = 0
+		for fluent in fluents:
+			mask |= self.bits[fluent]
+		return mask
+
+
+	"""
+		:param state: str eg. "TFFTFT" string of mapped positive and negative fluents
+		:return: int mask of the positive fluents
+	"""
+	def from_string(self, state: str) -> int:
+
+		return int(state.translate(str.maketrans('TF', '10')), 2)
+
+
+	"""
+		:param state: int mask of the positive fluents
+		:return: str eg. "TFFTFT" string of mapped positive and negative fluents
+	"""
+	def to_string(self, state: int) -> str:
+
+		return format(state, 'b').zfill(len(self.state_map)).translate(str.maketrans('10', 'TF'))
+
+
+	"""
+		:param state: int mask of the positive fluents
+		:return: FluentState object
+	"""
+	def decode(self, state: int) -> FluentState:
+
+		fs = FluentState([], [])
+		for fluent in self.state_map:
+			if state & self.bits[fluent]:
+				fs.pos.append(fluent)
+			else:
+				fs.neg.append(fluent)
+		return fs
@@ -1,10 +1,11 @@
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from aimacode.utils import expr
 from aimacode.logic import PropKB
 from aimacode.planning import Action
 from aimacode.search import (Node, Problem)
-from my_planning_graph import PlanningGraph
-from lp_utils import (FluentState, encode_state, decode_state)
+from my_planning_graph import GroundedPlanningGraph
+from relaxed_heuristics import (RelaxedHeuristics, RelaxedHeuristicsMixin)
+from lp_utils import (FluentState, encode_state, decode_state, action_index)
 
 
 
@@ -24,7 +25,7 @@ from lp_utils import (FluentState, encode_state, decode_state)
 		:param goal: list of expr
 				literal fluents required for goal test
 """
-class AirCargoProblem(Problem):
+class AirCargoProblem(RelaxedHeuristicsMixin, Problem):
 
 	def __init__(self, cargos, planes, airports, initial: FluentState, goal: list):
 		self.cargos           = cargos
@@ -36,11 +37,32 @@ class AirCargoProblem(Problem):
 		Problem.__init__(self, self.initial_state_TF, goal=goal)
 
 
+	"""
+		The grounded planning graph of the problem, built on the first call of
+		`h_pg_levelsum` since the other searches do not need it.
+	"""
+	@cached_property
+	def planning_graph(self):
+
+		return GroundedPlanningGraph(self)
+
+
+	"""
+		The delete relaxation of the problem, built on the first call of one of
+		the `RelaxedHeuristicsMixin` heuristics.
+	"""
+	@cached_property
+	def relaxed(self):
+
+		return RelaxedHeuristics(self)
+
+
 	"""
 		This method creates concrete actions (no variables) for all actions in the problem
 		domain action schema and turns them into complete Action objects as defined in the
 		aimacode.planning module. It is computationally expensive to call this method directly;
-		however, it is called in the constructor and the results cached in the `actions_list` property.
+		however, it is called in the constructor and the results cached in the `actions_list` property,
+		along with the index of the actions by trigger fluent used by `actions`.
 
 		Returns:
 		----------
@@ -141,7 +163,9 @@ class AirCargoProblem(Problem):
 			return flys
 
 
-		return load_actions() + unload_actions() + fly_actions()
+		actions = load_actions() + unload_actions() + fly_actions()
+		self.trigger_index, self.unconditional_actions = action_index(actions)
+		return actions
 
 
 	"""
@@ -154,24 +178,18 @@ class AirCargoProblem(Problem):
 	"""
 	def actions(self, state: str) -> list:
 
-		kb = PropKB()
-		possible_actions = []
-		kb.tell(decode_state(state, self.state_map).pos_sentence())
-
-		for action in self.actions_list:
-
-			is_action_possible = True
+		pos = set(fluent for fluent, char in zip(self.state_map, state) if char == 'T')
 
-			for c in action.precond_neg:
-				if c in kb.clauses:
-					is_action_possible = False
-					break
+		# only the actions triggered by a true fluent can apply
+		candidates = list(self.unconditional_actions)
+		for fluent in pos:
+			candidates.extend(self.trigger_index.get(fluent, ()))
+		candidates.sort()
 
-			if is_action_possible:
-				if len(list(set(action.precond_pos) - set(kb.clauses))) > 0:
-					is_action_possible = False
-
-			if is_action_possible:
+		possible_actions = []
+		for idx in candidates:
+			action = self.actions_list[idx]
+			if all(c in pos for c in action.precond_pos) and not any(c in pos for c in action.precond_neg):
 				possible_actions.append(action)
 
 		return possible_actions
@@ -242,9 +260,8 @@ class AirCargoProblem(Problem):
 	@lru_cache(maxsize=8192)
 	def h_pg_levelsum(self, node: Node):
 
-		# requires implemented PlanningGraph class
-		pg = PlanningGraph(self, node.state)
-		pg_levelsum = pg.h_levelsum()
+		# the planning graph is grounded once per problem (see GroundedPlanningGraph)
+		pg_levelsum = self.planning_graph.h_levelsum(node.state)
 
 		return pg_levelsum
 
@@ -1,5 +1,5 @@
 from aimacode.utils import expr
-from lp_utils import decode_state
+from lp_utils import (FluentIndex, decode_state)
 from aimacode.search import Problem
 from aimacode.planning import Action
 
@@ -241,6 +241,8 @@ class PlanningGraph():
 		:param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
 		:param state: str (will be in form TFTTFF... representing fluent states)
 		:param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+		:param numpy_mutex: bool (whether to compute the mutexes of each level as NumPy boolean matrix
+			products, see update_a_mutex_matrix and update_s_mutex_matrix, instead of testing every pair)
 		Instance variable calculated:
 			fs: FluentState
 				the state represented as positive and negative fluent literal lists
@@ -248,13 +250,19 @@ class PlanningGraph():
 			s_levels: list of sets of PgNode_s, where each set in the list represents an S-level in the planning graph
 			a_levels: list of sets of PgNode_a, where each set in the list represents an A-level in the planning graph
 	"""
-	def __init__(self, problem: Problem, state: str, serial_planning=True):
+	def __init__(self, problem: Problem, state: str, serial_planning=True, numpy_mutex=False):
 		self.s_levels    = []
 		self.a_levels    = []
 		self.problem     = problem
 		self.serial      = serial_planning
+		self.numpy_mutex = numpy_mutex
 		self.fs          = decode_state(state, problem.state_map)
 		self.all_actions = self.problem.actions_list + self.noop_actions(self.problem.state_map)
+		if numpy_mutex:
+			self.fluent_ids   = dict((fluent, i) for i, fluent in enumerate(problem.state_map))
+			self.action_rows  = dict((id(action), i) for i, action in enumerate(self.all_actions))
+			self.incidence    = self.incidence_matrices(self.all_actions)
+			self.level_mutex  = None
 		self.create_graph()
 
 
@@ -407,6 +415,8 @@ class PlanningGraph():
 			mutex set in each PgNode_a in the set is appropriately updated
 	"""
 	def update_a_mutex(self, nodeset):
+		if self.numpy_mutex:
+			return self.update_a_mutex_matrix(nodeset)
 		nodelist = list(nodeset)
 		for i, n1 in enumerate(nodelist[:-1]):
 			for n2 in nodelist[i + 1:]:
@@ -522,6 +532,8 @@ class PlanningGraph():
 			mutex set in each PgNode_a in the set is appropriately updated
 	"""
 	def update_s_mutex(self, nodeset: set):
+		if self.numpy_mutex:
+			return self.update_s_mutex_matrix(nodeset)
 		nodelist = list(nodeset)
 		for i, n1 in enumerate(nodelist[:-1]):
 			for n2 in nodelist[i + 1:]:
@@ -581,6 +593,156 @@ class PlanningGraph():
 
 
 
+	"""
+		Boolean incidence matrices of the preconditions and effects of actions
+		over the fluents of the problem, one row per action.
+
+		:param actions: list of Action
+		:return: tuple of np.ndarray (precond_pos, precond_neg, effect_add, effect_rem)
+	"""
+	def incidence_matrices(self, actions: list) -> tuple:
+		import numpy as np
+
+		matrices = tuple(np.zeros((len(actions), len(self.fluent_ids)), dtype=bool) for _ in range(4))
+		for row, action in enumerate(actions):
+			for matrix, fluents in zip(matrices, (action.precond_pos, action.precond_neg,
+												  action.effect_add, action.effect_rem)):
+				for fluent in fluents:
+					matrix[row, self.fluent_ids[fluent]] = True
+
+		return matrices
+
+
+
+	"""
+		Boolean matrix of the mutexes among a list of sibling nodes. The matrix
+		of the level last updated is reused, otherwise it is read from the mutex
+		sets of the nodes.
+
+		:param nodelist: list of PgNode (siblings in the same level)
+		:return: np.ndarray
+	"""
+	def sibling_mutex_matrix(self, nodelist: list):
+		import numpy as np
+
+		if self.level_mutex is not None:
+			index, matrix = self.level_mutex
+			rows = [index.get(node) for node in nodelist]
+			if None not in rows:
+				return matrix[np.ix_(rows, rows)]
+
+		position = dict((node, i) for i, node in enumerate(nodelist))
+		matrix   = np.zeros((len(nodelist), len(nodelist)), dtype=bool)
+		for i, node in enumerate(nodelist):
+			for other in node.mutex:
+				if other in position:
+					matrix[i, position[other]] = True
+
+		return matrix
+
+
+
+	"""
+		Boolean matrix of the parents of the given nodes, one row per node and
+		one column per parent, along with the mutex matrix of the parents.
+
+		:param nodelist: list of PgNode
+		:return: tuple of np.ndarray (parents, parents mutex)
+	"""
+	def parent_matrices(self, nodelist: list) -> tuple:
+		import numpy as np
+
+		parents  = list(set().union(*(node.parents for node in nodelist)))
+		position = dict((node, i) for i, node in enumerate(parents))
+		matrix   = np.zeros((len(nodelist), len(parents)), dtype=bool)
+		for i, node in enumerate(nodelist):
+			matrix[i, [position[parent] for parent in node.parents]] = True
+
+		return matrix, self.sibling_mutex_matrix(parents)
+
+
+
+	"""
+		Mark the pairs of a boolean mutex matrix as mutex and keep the matrix
+		for the next level.
+
+		:param nodelist: list of PgNode (siblings in the same level)
+		:param matrix: np.ndarray of the mutex pairs
+		:return:
+			mutex set in each node of the list is appropriately updated
+	"""
+	def mutexify_matrix(self, nodelist: list, matrix):
+		import numpy as np
+
+		np.fill_diagonal(matrix, False)
+		for i, j in zip(*np.nonzero(np.triu(matrix, 1))):
+			mutexify(nodelist[i], nodelist[j])
+		self.level_mutex = (dict((node, i) for i, node in enumerate(nodelist)), matrix)
+
+
+
+	"""
+		Determine and update sibling mutual exclusion for A-level nodes with
+		boolean matrix products, for the same relations as update_a_mutex:
+		with P+/P-/E+/E- the precondition and effect incidence matrices of the
+		level, inconsistent effects are E+ E-^T, interference E+ P-^T + E- P+^T
+		(both made symmetric), and competing needs A M A^T for the parent matrix A
+		and the mutex matrix M of the parents.
+
+		:param nodeset: set of PgNode_a (siblings in the same level)
+		:return:
+			mutex set in each PgNode_a in the set is appropriately updated
+	"""
+	def update_a_mutex_matrix(self, nodeset):
+		import numpy as np
+
+		nodelist = list(nodeset)
+		rows     = [self.action_rows.get(id(node.action)) for node in nodelist]
+		if None in rows:
+			precond_pos, precond_neg, effect_add, effect_rem = \
+				self.incidence_matrices([node.action for node in nodelist])
+		else:
+			precond_pos, precond_neg, effect_add, effect_rem = (matrix[rows] for matrix in self.incidence)
+
+		mutex  = effect_add @ effect_rem.T
+		mutex |= effect_add @ precond_neg.T | effect_rem @ precond_pos.T
+		mutex |= mutex.T
+		if self.serial:
+			active = np.array([not node.is_persistent for node in nodelist], dtype=bool)
+			mutex |= np.outer(active, active)
+		parents, parents_mutex = self.parent_matrices(nodelist)
+		mutex |= parents @ parents_mutex @ parents.T
+
+		self.mutexify_matrix(nodelist, mutex)
+
+
+
+	"""
+		Determine and update sibling mutual exclusion for S-level nodes with
+		boolean matrix products, for the same relations as update_s_mutex:
+		negation compares the fluent ids and signs of the literals, and two
+		literals have inconsistent support when A (not M) A^T is false for the
+		parent matrix A and the mutex matrix M of the parent actions.
+
+		:param nodeset: set of PgNode_s (siblings in the same level)
+		:return:
+			mutex set in each PgNode_s in the set is appropriately updated
+	"""
+	def update_s_mutex_matrix(self, nodeset: set):
+		import numpy as np
+
+		nodelist = list(nodeset)
+		symbols  = np.array([self.fluent_ids[node.symbol] for node in nodelist])
+		signs    = np.array([node.is_pos for node in nodelist], dtype=bool)
+
+		mutex = (symbols[:, None] == symbols[None, :]) & (signs[:, None] != signs[None, :])
+		parents, parents_mutex = self.parent_matrices(nodelist)
+		mutex |= ~(parents @ ~parents_mutex @ parents.T)
+
+		self.mutexify_matrix(nodelist, mutex)
+
+
+
 	"""
 		The sum of the level costs of the individual goals (admissible if goals independent)
 		:return: int
@@ -603,3 +765,207 @@ class PlanningGraph():
 
 
 
+
+
+
+"""
+	A planning graph grounded once per problem, which evaluates any number of
+	states by propagating the levels over integer literal masks instead of
+	building PgNode sets for every state.
+
+	Literals are bits of a mask of 2n bits for the n fluents of the problem:
+	the positive literal of a fluent is its `FluentIndex` bit and the negative
+	literal is the same bit shifted by n, so a T/F state mask (as used by
+	BitsetProblem) gives the S0 level as `state | ~state << n`. Every action is
+	compiled into the masks of its precondition and effect literals, and no-op
+	actions are implicit (the S levels only ever grow).
+
+	As in PlanningGraph, an action enters an A level when its preconditions are
+	in the previous S level and the graph is built until two S levels hold the
+	same literals, so `h_levelsum` gives the same values as
+	`PlanningGraph(problem, state).h_levelsum()`. The mutex relations, which do
+	not change the levels, are only computed by `mutex_levels`.
+
+	:param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+	:param serial_planning: bool (whether or not to assume that only one action can occur at a time)
+"""
+class GroundedPlanningGraph():
+
+	def __init__(self, problem: Problem, serial_planning=True):
+		self.problem   = problem
+		self.serial    = serial_planning
+		self.index     = FluentIndex(problem.state_map)
+		self.size      = len(problem.state_map)
+		self.full      = (1 << self.size) - 1
+		self.actions   = [(self.literals(action.precond_pos, action.precond_neg),
+						   self.literals(action.effect_add, action.effect_rem))
+						  for action in problem.actions_list]
+		self.goal_bits = [self.index.bits[goal] for goal in problem.goal]
+
+
+	"""
+		:param pos: iterable of fluents (expr) of positive literals
+		:param neg: iterable of fluents (expr) of negative literals
+		:return: int literal mask
+	"""
+	def literals(self, pos, neg) -> int:
+
+		return self.index.mask(pos) | self.index.mask(neg) << self.size
+
+
+	"""
+		:param literals: int literal mask
+		:return: int mask of the negated literals
+	"""
+	def negation(self, literals: int) -> int:
+
+		return literals >> self.size | (literals & self.full) << self.size
+
+
+	"""
+		:param state: str (in form TFTTFF...) or int mask of the positive fluents
+		:return: int literal mask of the S0 level
+	"""
+	def initial_level(self, state) -> int:
+
+		if isinstance(state, str):
+			state = self.index.from_string(state)
+		return state | (~state & self.full) << self.size
+
+
+	"""
+		Literal masks of the S levels of the graph built from the state, up to
+		the level where it levels off. The actions already in an A level are not
+		tested again, as they stay in every later level.
+
+		:param state: str (in form TFTTFF...) or int mask of the positive fluents
+		:return: list of int literal masks
+	"""
+	def s_levels(self, state) -> list:
+
+		literals = self.initial_level(state)
+		levels   = [literals]
+		pending  = self.actions
+		while True:
+			reached = literals
+			waiting = []
+			for precond, effect in pending:
+				if precond & literals == precond:
+					reached |= effect
+				else:
+					waiting.append((precond, effect))
+			if reached == literals:
+				return levels
+			literals = reached
+			pending  = waiting
+			levels.append(literals)
+
+
+	"""
+		The sum of the level costs of the individual goals (admissible if goals
+		independent); goals the graph never reaches add nothing, as in
+		PlanningGraph.h_levelsum.
+
+		:param state: str (in form TFTTFF...) or int mask of the positive fluents
+		:return: int
+	"""
+	def h_levelsum(self, state) -> int:
+
+		levels    = self.s_levels(state)
+		level_sum = 0
+		for bit in self.goal_bits:
+			for level, literals in enumerate(levels):
+				if literals & bit:
+					level_sum += level
+					break
+
+		return level_sum
+
+
+	"""
+		S levels of the graph built from the state together with their literal
+		mutexes, following Russell-Norvig 3rd Ed 10.3: actions are mutex for
+		serial planning (two non-persistent actions), inconsistent effects,
+		interference and competing needs; literals are mutex for negation and
+		inconsistent support. The graph is built until both the literals and
+		their mutexes level off.
+
+		Actions are numbered in the order of `actions_list` followed by one
+		no-op per literal, and the mutexes of an action (or literal) are an int
+		mask over the action (or literal) numbers of its level.
+
+		:param state: str (in form TFTTFF...) or int mask of the positive fluents
+		:return: list of (int literal mask, dict of literal bit -> int mask of
+			the literal bits mutex with it)
+	"""
+	def mutex_levels(self, state) -> list:
+
+		literal_bits = [1 << i for i in range(2 * self.size)]
+		all_actions  = [(precond, effect, False) for precond, effect in self.actions] + \
+					   [(bit, bit, True) for bit in literal_bits]
+		negated      = [(self.negation(precond), self.negation(effect)) for precond, effect, _ in all_actions]
+
+		literals = self.initial_level(state)
+		mutex    = dict((bit, 0) for bit in literal_bits if literals & bit)
+		levels   = [(literals, mutex)]
+		while True:
+			# A level and its mutexes
+			applied = [k for k, (precond, _, _) in enumerate(all_actions) if precond & literals == precond]
+			a_mutex = dict((k, 0) for k in applied)
+			for i, k1 in enumerate(applied):
+				precond1, effect1, persistent1 = all_actions[k1]
+				not_precond1, not_effect1 = negated[k1]
+				needs1 = 0
+				bits = precond1
+				while bits:
+					bit = bits & -bits
+					bits ^= bit
+					needs1 |= mutex[bit]
+				for k2 in applied[i + 1:]:
+					precond2, effect2, persistent2 = all_actions[k2]
+					if ((self.serial and not persistent1 and not persistent2) or
+							effect2 & not_effect1 or
+							effect2 & not_precond1 or precond2 & not_effect1 or
+							precond2 & needs1):
+						a_mutex[k1] |= 1 << k2
+						a_mutex[k2] |= 1 << k1
+
+			# next S level and its mutexes
+			achievers = {}
+			for k in applied:
+				bits = all_actions[k][1]
+				while bits:
+					bit = bits & -bits
+					bits ^= bit
+					achievers[bit] = achievers.get(bit, 0) | 1 << k
+			reached   = list(achievers)
+			s_mutex   = dict((bit, 0) for bit in reached)
+			for i, bit1 in enumerate(reached):
+				for bit2 in reached[i + 1:]:
+					if bit2 == self.negation(bit1) or self.inconsistent_support(achievers[bit1], achievers[bit2], a_mutex):
+						s_mutex[bit1] |= bit2
+						s_mutex[bit2] |= bit1
+
+			next_literals = sum(reached)
+			if next_literals == literals and s_mutex == mutex:
+				return levels
+			literals, mutex = next_literals, s_mutex
+			levels.append((literals, mutex))
+
+
+	"""
+		:param achievers1: int mask of the actions achieving a literal
+		:param achievers2: int mask of the actions achieving another literal
+		:param a_mutex: dict of action number -> int mask of its mutex actions
+		:return: bool, True if every pair of achievers is mutex
+	"""
+	def inconsistent_support(self, achievers1: int, achievers2: int, a_mutex: dict) -> bool:
+
+		bits = achievers1
+		while bits:
+			bit = bits & -bits
+			bits ^= bit
+			if achievers2 & ~a_mutex[bit.bit_length() - 1]:
+				return False
+
+		return True
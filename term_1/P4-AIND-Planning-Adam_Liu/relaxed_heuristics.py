@@ -0,0 +1,327 @@
+from collections import deque
+from functools import lru_cache
+from heapq import heapify, heappop, heappush
+from aimacode.search import (Node, Problem)
+from lp_utils import FluentIndex
+
+
+
+INF = float('inf')
+
+
+
+"""
+	Delete-relaxation heuristics of a planning problem, computed over integer
+	fluent ids (the positions of the fluents in the `state_map`).
+
+	The ground actions are compiled once into the ids of their positive
+	preconditions and of their add effects (the relaxation ignores the negative
+	preconditions and the delete lists), along with the actions each fluent is a
+	precondition of, so the reachability of a state is a generalized Dijkstra
+	over the fluents where an action fires once its last precondition is
+	reached. All actions cost 1 and unreachable goals give an infinite value.
+
+		h_max       cost of the most costly goal (admissible)
+		h_add       sum of the goal costs (not admissible)
+		h_ff        length of a relaxed plan extracted from the h_add supporters (not admissible)
+		h_lmcut     LM-cut: sum of the costs of disjunctive action landmarks (admissible)
+		h_landmarks number of fact landmarks not true in the state; admissible when,
+					as in the air cargo problems, every action adds a single fluent
+
+	The states are T/F strings or int masks of the positive fluents (as
+	in BitsetProblem).
+
+	:param problem: PlanningProblem (or subclass such as AirCargoProblem or HaveCakeProblem)
+"""
+class RelaxedHeuristics():
+
+	def __init__(self, problem: Problem):
+		self.index   = FluentIndex(problem.state_map)
+		self.size    = len(problem.state_map)
+		fluent_ids   = dict((fluent, i) for i, fluent in enumerate(problem.state_map))
+		self.precond = [tuple(fluent_ids[fluent] for fluent in action.precond_pos) for action in problem.actions_list]
+		self.add     = [tuple(fluent_ids[fluent] for fluent in action.effect_add) for action in problem.actions_list]
+		self.goals   = [fluent_ids[goal] for goal in problem.goal]
+
+		self.precondition_of = [[] for _ in range(self.size)]
+		self.achievers       = [[] for _ in range(self.size)]
+		for a, (precond, add) in enumerate(zip(self.precond, self.add)):
+			for f in precond:
+				self.precondition_of[f].append(a)
+			for f in add:
+				self.achievers[f].append(a)
+		self.unconditional = [a for a, precond in enumerate(self.precond) if not precond]
+		self.unit_costs    = [1] * len(self.precond)
+
+
+	"""
+		:param state: str (in form TFTTFF...) or int mask of the positive fluents
+		:return: list of the ids of the true fluents
+	"""
+	def fluent_ids(self, state) -> list:
+
+		if isinstance(state, str):
+			return [i for i, value in enumerate(state) if value == 'T']
+		ids  = []
+		bits = state
+		while bits:
+			bit = bits & -bits
+			bits ^= bit
+			ids.append(self.size - bit.bit_length())
+		return ids
+
+
+	"""
+		Relaxed reachability of the fluents from the true fluents, with the
+		cost of an action the max (h_max) or the sum (h_add) of the costs of its
+		preconditions plus its own cost.
+
+		:param ids: list of the ids of the true fluents
+		:param additive: bool (sum instead of max of the precondition costs)
+		:param costs: list of the action costs
+		:param all_fluents: bool (whether to go on once the goals are reached)
+		:return: tuple (list of fluent costs, list of the action each fluent was
+			reached with, list of the precondition each action was reached with,
+			None for the actions without preconditions)
+	"""
+	def propagate(self, ids: list, additive: bool, costs: list, all_fluents=False) -> tuple:
+
+		cost      = [INF] * self.size
+		supporter = [None] * self.size
+		pcf       = [None] * len(self.precond)
+		remaining = [len(precond) for precond in self.precond]
+		reached   = [0] * len(self.precond)
+		heap      = []
+		for f in ids:
+			cost[f] = 0
+			heap.append((0, f))
+		for a in self.unconditional:
+			for g in self.add[a]:
+				if costs[a] < cost[g]:
+					cost[g], supporter[g] = costs[a], a
+					heap.append((costs[a], g))
+		heapify(heap)
+
+		goals_left = set(self.goals)
+		while heap:
+			c, f = heappop(heap)
+			if c > cost[f]:
+				continue
+			goals_left.discard(f)
+			if not goals_left and not all_fluents:
+				break
+			for a in self.precondition_of[f]:
+				reached[a] = reached[a] + c if additive else max(reached[a], c)
+				remaining[a] -= 1
+				if remaining[a] == 0:
+					pcf[a] = f
+					a_cost = reached[a] + costs[a]
+					for g in self.add[a]:
+						if a_cost < cost[g]:
+							cost[g], supporter[g] = a_cost, a
+							heappush(heap, (a_cost, g))
+
+		return cost, supporter, pcf
+
+
+	def h_max(self, state):
+
+		cost, _, _ = self.propagate(self.fluent_ids(state), False, self.unit_costs)
+		return max([cost[g] for g in self.goals] or [0])
+
+
+	def h_add(self, state):
+
+		cost, _, _ = self.propagate(self.fluent_ids(state), True, self.unit_costs)
+		return sum(cost[g] for g in self.goals)
+
+
+	"""
+		Length of the relaxed plan made of the h_add supporters of the goals and,
+		recursively, of the preconditions of the supporters.
+	"""
+	def h_ff(self, state):
+
+		cost, supporter, _ = self.propagate(self.fluent_ids(state), True, self.unit_costs)
+		open_fluents = [g for g in self.goals if cost[g] > 0]
+		if any(cost[g] == INF for g in open_fluents):
+			return INF
+
+		plan = set()
+		seen = set(open_fluents)
+		while open_fluents:
+			a = supporter[open_fluents.pop()]
+			if a in plan:
+				continue
+			plan.add(a)
+			for f in self.precond[a]:
+				if cost[f] > 0 and f not in seen:
+					seen.add(f)
+					open_fluents.append(f)
+
+		return len(plan)
+
+
+	"""
+		LM-cut (Helmert & Domshlak 2009): while the h_max of the goals is not 0,
+		find the cut of the justification graph (the edges from the precondition
+		with the highest h_max of each action to its effects) separating the
+		fluents reachable from the state from the goal zone (the fluents reaching
+		the costliest goal through zero-cost actions), add the cost of its
+		cheapest action and take that cost off every action of the cut.
+	"""
+	def h_lmcut(self, state):
+
+		ids   = self.fluent_ids(state)
+		costs = list(self.unit_costs)
+		total = 0
+		while True:
+			cost, _, pcf = self.propagate(ids, False, costs, all_fluents=True)
+			goal = max(self.goals, key=lambda g: cost[g]) if self.goals else None
+			if goal is None or cost[goal] == 0:
+				return total
+			if cost[goal] == INF:
+				return INF
+
+			goal_zone = set([goal])
+			stack     = [goal]
+			while stack:
+				f = stack.pop()
+				for a in self.achievers[f]:
+					if costs[a] == 0 and pcf[a] is not None and pcf[a] not in goal_zone:
+						goal_zone.add(pcf[a])
+						stack.append(pcf[a])
+
+			justified = {}
+			for a, f in enumerate(pcf):
+				if f is not None:
+					justified.setdefault(f, []).append(a)
+			cut     = set()
+			reached = set(ids)
+			stack   = list(ids)
+			for a in self.unconditional:
+				self.cut_edges(a, goal_zone, reached, stack, cut)
+			while stack:
+				for a in justified.get(stack.pop(), ()):
+					self.cut_edges(a, goal_zone, reached, stack, cut)
+
+			landmark_cost = min(costs[a] for a in cut)
+			total += landmark_cost
+			for a in cut:
+				costs[a] -= landmark_cost
+
+
+	"""
+		Follow the justification graph edges of an action from a fluent reached
+		from the state: an effect in the goal zone puts the action in the cut,
+		other effects are reached in turn.
+	"""
+	def cut_edges(self, a: int, goal_zone: set, reached: set, stack: list, cut: set):
+
+		for g in self.add[a]:
+			if g in goal_zone:
+				cut.add(a)
+			elif g not in reached:
+				reached.add(g)
+				stack.append(g)
+
+
+	"""
+		Fact landmarks of the relaxed problem from the state, as int masks over
+		the fluent ids, by the fixpoint of Zhu & Givan: the landmarks of a fluent
+		are the fluent itself and the landmarks shared by all of its achievers,
+		those of an action being the landmarks of its preconditions.
+
+		:param state: str (in form TFTTFF...) or int mask of the positive fluents
+		:return: list of int masks (None for the unreachable fluents)
+	"""
+	def landmarks(self, state) -> list:
+
+		ids       = self.fluent_ids(state)
+		landmarks = [None] * self.size
+		for f in ids:
+			landmarks[f] = 1 << f
+		queue    = deque(self.unconditional)
+		queued   = [False] * len(self.precond)
+		for a in queue:
+			queued[a] = True
+		for f in ids:
+			for a in self.precondition_of[f]:
+				if not queued[a]:
+					queued[a] = True
+					queue.append(a)
+
+		while queue:
+			a = queue.popleft()
+			queued[a] = False
+			if any(landmarks[f] is None for f in self.precond[a]):
+				continue
+			shared = 0
+			for f in self.precond[a]:
+				shared |= landmarks[f]
+			for g in self.add[a]:
+				found = shared | 1 << g
+				if landmarks[g] is not None:
+					found &= landmarks[g]
+				if found != landmarks[g]:
+					landmarks[g] = found
+					for b in self.precondition_of[g]:
+						if not queued[b]:
+							queued[b] = True
+							queue.append(b)
+
+		return landmarks
+
+
+	def h_landmarks(self, state):
+
+		landmarks = self.landmarks(state)
+		needed    = 0
+		for g in self.goals:
+			if landmarks[g] is None:
+				return INF
+			needed |= landmarks[g]
+		for f in self.fluent_ids(state):
+			needed &= ~(1 << f)
+
+		return bin(needed).count('1')
+
+
+
+"""
+	Search heuristics of the planning problems that keep a RelaxedHeuristics of
+	themselves in `relaxed` (AirCargoProblem and BitsetProblem), as functions
+	of search nodes: h_max and h_lmcut are admissible, h_add and h_ff are meant
+	for greedy search, and h_landmarks counts the fact landmarks still to be
+	reached.
+"""
+class RelaxedHeuristicsMixin():
+
+	@lru_cache(maxsize=8192)
+	def h_max(self, node: Node):
+
+		return self.relaxed.h_max(node.state)
+
+
+	@lru_cache(maxsize=8192)
+	def h_add(self, node: Node):
+
+		return self.relaxed.h_add(node.state)
+
+
+	@lru_cache(maxsize=8192)
+	def h_ff(self, node: Node):
+
+		return self.relaxed.h_ff(node.state)
+
+
+	@lru_cache(maxsize=8192)
+	def h_lmcut(self, node: Node):
+
+		return self.relaxed.h_lmcut(node.state)
+
+
+	@lru_cache(maxsize=8192)
+	def h_landmarks(self, node: Node):
+
+		return self.relaxed.h_landmarks(node.state)
@@ -6,6 +6,7 @@ from aimacode.search import (breadth_first_search, astar_search,
     greedy_best_first_graph_search, depth_limited_search,
     recursive_best_first_search)
 from my_air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3
+from bitset_problem import BitsetProblem
 
 PROBLEM_CHOICE_MSG = """
 Select from the following list of air cargo problems. You may choose more than
@@ -36,6 +37,11 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_1'],
             ['astar_search', astar_search, 'h_ignore_preconditions'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_lmcut'],
+            ['astar_search', astar_search, 'h_landmarks'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_add'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_ff'],
             ]
 
 
@@ -85,7 +91,7 @@ def manual():
                                                " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, bitset=False):
 
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
@@ -96,7 +102,7 @@ def main(p_choices, s_choices):
             hstring = h if not h else " with {}".format(h)
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
-            _p = p()
+            _p = p() if not bitset else BitsetProblem(p())
             _h = None if not h else getattr(_p, h)
             run_search(_p, s, _h)
 
@@ -121,12 +127,14 @@ if __name__=="__main__":
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('-b', '--bitset', action="store_true",
+                        help="Search over integer bitmask states instead of T/F strings.")
     args = parser.parse_args()
 
     if args.manual:
         manual()
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))), args.bitset)
     else:
         print()
         parser.print_help()
@@ -0,0 +1,77 @@
+import unittest
+
+from aimacode.search import Node, astar_search, breadth_first_search
+from lp_utils import decode_state
+
+from bitset_problem import BitsetProblem, FluentIndex
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+
+
+class TestBitsetProblem(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = air_cargo_p1()
+        self.b1 = BitsetProblem(self.p1)
+
+    def test_state_encoding(self):
+        index = self.b1.index
+        self.assertEqual(index.to_string(self.b1.initial), self.p1.initial)
+        fs = index.decode(self.b1.initial)
+        self.assertEqual(fs.pos, decode_state(self.p1.initial, self.p1.state_map).pos)
+        # masks compare in the same order as the state strings
+        states = ['TFFT', 'FTTF', 'TTFF', 'FFFT']
+        index = FluentIndex(list('abcd'))
+        self.assertEqual(sorted(states, key=index.from_string), sorted(states))
+
+    def test_actions_result_goal(self):
+        for problem in (self.p1, air_cargo_p2(), have_cake()):
+            bitset = BitsetProblem(problem)
+            state, mask = problem.initial, bitset.initial
+            for _ in range(6):
+                actions = problem.actions(state)
+                self.assertEqual(bitset.actions(mask), actions)
+                self.assertEqual(bitset.goal_test(mask), problem.goal_test(state))
+                state = problem.result(state, actions[-1])
+                mask = bitset.result(mask, actions[-1])
+                self.assertEqual(bitset.index.to_string(mask), state)
+
+    def test_action_index(self):
+        # the indexed candidates give the same actions as a scan of all actions
+        p2 = air_cargo_p2()
+        state = p2.initial
+        for _ in range(8):
+            pos = set(decode_state(state, p2.state_map).pos)
+            scan = [a for a in p2.actions_list
+                    if set(a.precond_pos) <= pos and not set(a.precond_neg) & pos]
+            self.assertEqual(p2.actions(state), scan)
+            state = p2.result(state, scan[len(scan) // 2])
+
+    def test_h_ignore_preconditions(self):
+        self.assertEqual(self.b1.h_ignore_preconditions(Node(self.b1.initial)), 2)
+
+    def test_shared_heuristics(self):
+        # the planning graph and the relaxation are built on first use
+        self.assertNotIn('planning_graph', vars(self.p1))
+        self.assertNotIn('relaxed', vars(self.p1))
+        self.assertEqual(self.b1.h_pg_levelsum(Node(self.b1.initial)),
+                         self.p1.h_pg_levelsum(Node(self.p1.initial)))
+        self.assertNotIn('relaxed', vars(self.p1))
+        # the wrapped problem's planning graph and relaxation are reused
+        self.assertIs(self.b1.planning_graph, self.p1.planning_graph)
+        self.assertIs(self.b1.relaxed, self.p1.relaxed)
+        for h in ('h_max', 'h_add', 'h_ff', 'h_lmcut', 'h_landmarks'):
+            self.assertEqual(getattr(self.b1, h)(Node(self.b1.initial)),
+                             getattr(self.p1, h)(Node(self.p1.initial)))
+        # problems without them get their own
+        cake = BitsetProblem(have_cake())
+        self.assertEqual(cake.h_max(Node(cake.initial)), 1)
+
+    def test_search(self):
+        for search in (breadth_first_search, lambda p: astar_search(p, p.h_ignore_preconditions)):
+            plan = search(self.b1).solution()
+            self.assertEqual([str(a) for a in plan], [str(a) for a in search(self.p1).solution()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,9 +5,10 @@ import unittest
 from aimacode.utils import expr
 from aimacode.planning import Action
 from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1
 
 from my_planning_graph import (
-    PlanningGraph, PgNode_a, PgNode_s, mutexify
+    PlanningGraph, GroundedPlanningGraph, PgNode_a, PgNode_s, mutexify
 )
 
 
@@ -114,6 +115,21 @@ class TestPlanningGraphMutex(unittest.TestCase):
             "If one parent action can achieve both states, should NOT be inconsistent-support mutex, even if parent actions are themselves mutex")
 
 
+class TestPlanningGraphNumpyMutex(unittest.TestCase):
+    def test_same_mutexes(self):
+        # the matrix mode marks the same mutex pairs as the pairwise tests
+        for p in (have_cake(), air_cargo_p1()):
+            for serial in (True, False):
+                pg = PlanningGraph(p, p.initial, serial)
+                npg = PlanningGraph(p, p.initial, serial, numpy_mutex=True)
+                for levels, np_levels in ((pg.a_levels, npg.a_levels), (pg.s_levels, npg.s_levels)):
+                    self.assertEqual(len(levels), len(np_levels))
+                    for nodeset, np_nodeset in zip(levels, np_levels):
+                        mutexes = dict((node, node.mutex) for node in nodeset)
+                        np_mutexes = dict((node, node.mutex) for node in np_nodeset)
+                        self.assertEqual(mutexes, np_mutexes)
+
+
 class TestPlanningGraphHeuristics(unittest.TestCase):
     def setUp(self):
         self.p = have_cake()
@@ -123,5 +139,39 @@ class TestPlanningGraphHeuristics(unittest.TestCase):
         self.assertEqual(self.pg.h_levelsum(), 1)
 
 
+class TestGroundedPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.p = have_cake()
+        self.gpg = GroundedPlanningGraph(self.p)
+
+    def test_s_levels(self):
+        pg = PlanningGraph(self.p, self.p.initial)
+        levels = self.gpg.s_levels(self.p.initial)
+        self.assertEqual([bin(literals).count('1') for literals in levels],
+                         [len(s_nodes) for s_nodes in pg.s_levels[:-1]])
+
+    def test_levelsum(self):
+        # same values as PlanningGraph from states along a plan
+        for p in (self.p, air_cargo_p1()):
+            gpg = GroundedPlanningGraph(p)
+            state = p.initial
+            for _ in range(4):
+                self.assertEqual(gpg.h_levelsum(state), PlanningGraph(p, state).h_levelsum())
+                state = p.result(state, p.actions(state)[0])
+
+    def test_mutex_levels(self):
+        literals, mutex = self.gpg.mutex_levels(self.p.initial)[1]
+        bit = lambda fluent, is_pos: self.gpg.literals([expr(fluent)] if is_pos else [],
+                                                       [] if is_pos else [expr(fluent)])
+        have, eaten = bit('Have(Cake)', True), bit('Eaten(Cake)', True)
+        not_have, not_eaten = bit('Have(Cake)', False), bit('Eaten(Cake)', False)
+        self.assertEqual(literals, have | eaten | not_have | not_eaten)
+        # Eat(Cake) is serialized with the no-ops and negates their effects
+        self.assertTrue(mutex[have] & eaten)
+        self.assertTrue(mutex[not_have] & not_eaten)
+        self.assertTrue(mutex[have] & not_have)
+        self.assertFalse(mutex[have] & not_eaten)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from aimacode.search import Node, astar_search, breadth_first_search, InstrumentedProblem
+
+from bitset_problem import BitsetProblem
+from example_have_cake import have_cake
+from my_air_cargo_problems import air_cargo_p1, air_cargo_p2
+from relaxed_heuristics import RelaxedHeuristics, INF
+
+HEURISTICS = ('h_max', 'h_add', 'h_ff', 'h_lmcut', 'h_landmarks')
+
+
+class TestRelaxedHeuristics(unittest.TestCase):
+
+    def setUp(self):
+        self.p1 = air_cargo_p1()
+        self.relaxed = RelaxedHeuristics(self.p1)
+
+    def test_values(self):
+        values = [getattr(self.relaxed, h)(self.p1.initial) for h in HEURISTICS]
+        self.assertEqual(values, [2, 6, 6, 5, 2])
+        # int masks of BitsetProblem give the same values as the T/F strings
+        mask = BitsetProblem(self.p1).initial
+        self.assertEqual([getattr(self.relaxed, h)(mask) for h in HEURISTICS], values)
+
+    def test_goal_and_dead_end(self):
+        goal_state = ''.join('T' if fluent in self.p1.goal else 'F' for fluent in self.p1.state_map)
+        for h in HEURISTICS:
+            self.assertEqual(getattr(self.relaxed, h)(goal_state), 0)
+            # no plane and no cargo anywhere
+            self.assertEqual(getattr(self.relaxed, h)('F' * len(self.p1.state_map)), INF)
+
+    def test_admissible(self):
+        p = have_cake()
+        relaxed = RelaxedHeuristics(p)
+        optimal = len(breadth_first_search(p).solution())
+        for h in ('h_max', 'h_lmcut', 'h_landmarks'):
+            self.assertLessEqual(getattr(relaxed, h)(p.initial), optimal)
+
+    def test_search(self):
+        p2 = air_cargo_p2()
+        expansions = {}
+        for h in ('h_ignore_preconditions', 'h_lmcut'):
+            ip = InstrumentedProblem(p2)
+            self.assertEqual(len(astar_search(ip, getattr(p2, h)).solution()), 9)
+            expansions[h] = ip.succs
+        self.assertLess(10 * expansions['h_lmcut'], expansions['h_ignore_preconditions'])
+        self.assertEqual(p2.h_ff(Node(p2.initial)), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()